@@ -0,0 +1,193 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from expression_engine import (ADD, DIV, FLOORDIV, LOAD, MAX_STEPS, MODES, MUL, NEG, POW, PUSH, SUB,
+                               CalculatorError, ExpressionTooLongError, ResultTooLargeError, UnknownVariableError,
+                               apply_binary, compile_expression, evaluate, format_result, variable_names)
+
+
+CHUNK_SIZE = 1 << 14
+ARRAY_FUNCTIONS = {ADD: np.add, SUB: np.subtract, MUL: np.multiply, DIV: np.true_divide, FLOORDIV: np.floor_divide,
+                   POW: np.power}
+
+
+def as_array_operand(value):
+    if isinstance(value, np.ndarray):
+        return value
+    try:
+        return float(value)
+    except OverflowError:
+        raise ResultTooLargeError() from None
+
+
+def evaluate_arrays(code, columns):
+    # Runs compiled code once over whole columns. Operations on constants alone use the engine's
+    # scalar arithmetic (exact integers, cost limits); anything touching a column is a single
+    # float64 NumPy operation, where division by zero or overflow gives inf/nan in that row, as
+    # in any float pipeline, instead of failing the batch.
+    if len(code) > MAX_STEPS:
+        raise ExpressionTooLongError()
+    stack = []
+    with np.errstate(all='ignore'):
+        for op, arg in code:
+            if op == PUSH:
+                stack.append(arg)
+            elif op == LOAD:
+                if arg not in columns:
+                    raise UnknownVariableError(arg)
+                stack.append(columns[arg])
+            elif op == NEG:
+                stack[-1] = -stack[-1]
+            else:
+                right = stack.pop()
+                left = stack[-1]
+                if isinstance(left, np.ndarray) or isinstance(right, np.ndarray):
+                    stack[-1] = ARRAY_FUNCTIONS[op](as_array_operand(left), as_array_operand(right))
+                else:
+                    stack[-1] = apply_binary(op, left, right)
+    return stack[0]
+
+
+def evaluate_columns(expression, columns, rows):
+    # one float64 result per row; an expression without variables is broadcast to every row
+    result = evaluate_arrays(compile_expression(expression), columns)
+    return np.broadcast_to(np.asarray(as_array_operand(result), dtype=np.float64), (rows,))
+
+
+def parse_cell(text, name, line):
+    # an empty or missing cell is a missing value (nan in that row); anything else must be a number
+    text = text.strip()
+    if not text:
+        return np.nan
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"line {line}, column {name}: not a number: {text!r}") from None
+
+
+def read_columns(path, names):
+    # Rows are split by the csv module, so quoted fields may hold commas; only the columns the
+    # expression uses are converted, so other columns may hold anything.
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        if not header:
+            raise ValueError(f"{path} has no header row")
+        for name in names:
+            if name not in header:
+                raise UnknownVariableError(name)
+        indices = [header.index(name) for name in names]
+        values = [[] for _ in names]
+        rows = 0
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            rows += 1
+            for index, name, column in zip(indices, names, values):
+                column.append(parse_cell(row[index], name, reader.line_num) if index < len(row) else np.nan)
+    return {name: np.array(column, dtype=np.float64) for name, column in zip(names, values)}, rows
+
+
+def evaluate_csv(path, expression):
+    columns, rows = read_columns(path, variable_names(compile_expression(expression)))
+    return evaluate_columns(expression, columns, rows)
+
+
+def evaluate_lines(lines, mode="float"):
+    # one result per line; generated files repeat formulas, which the compile cache absorbs
+    results = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            results.append("")
+            continue
+        try:
+            results.append(format_result(evaluate(line, mode=mode)))
+        except CalculatorError as e:
+            results.append(f"Error: {e}")
+        except Exception as e:
+            # an unexpected failure costs its own row, not the rest of the batch
+            results.append(f"Error: {type(e).__name__}: {e}")
+    return results
+
+
+def iter_line_chunks(path, chunk_size=CHUNK_SIZE):
+    with open(path, 'r', encoding='utf-8') as f:
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def iter_results(chunks, workers=1, mode="float"):
+    # results in input order; at most two chunks per worker are in flight, so memory stays bounded
+    if workers == 1:
+        for chunk in chunks:
+            yield evaluate_lines(chunk, mode)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(evaluate_lines, chunk, mode))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def evaluate_file(path, out, workers=1, chunk_size=CHUNK_SIZE, mode="float"):
+    count = 0
+    for results in iter_results(iter_line_chunks(path, chunk_size), workers or os.cpu_count() or 1, mode):
+        out.write('\n'.join(results) + '\n')
+        count += len(results)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate calculator expressions in bulk")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    columns_parser = subparsers.add_parser("columns", help="evaluate one expression over the columns of a CSV file, "
+                                                           "referring to columns by their header names")
+    columns_parser.add_argument("csv")
+    columns_parser.add_argument("expression")
+    columns_parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    columns_parser.add_argument("--name", default="result", help="header of the output column")
+    file_parser = subparsers.add_parser("file", help="evaluate a file of independent expressions (one per line)")
+    file_parser.add_argument("input")
+    file_parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    file_parser.add_argument("--workers", type=int, default=1, help="worker processes (0: one per CPU)")
+    file_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="expressions per worker task")
+    file_parser.add_argument("--mode", choices=MODES, default="float", help="arithmetic of non-integer results")
+    args = parser.parse_args()
+
+    if args.command == "file" and (args.workers < 0 or args.chunk_size < 1):
+        parser.error("workers must be non-negative and chunk size positive")
+    started = time.perf_counter()
+    try:
+        out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+        with out:
+            if args.command == "columns":
+                values = evaluate_csv(args.csv, args.expression)
+                out.write(args.name + '\n')
+                np.savetxt(out, values, fmt='%s')
+                count = len(values)
+            else:
+                count = evaluate_file(args.input, out, args.workers, args.chunk_size, args.mode)
+    except (OSError, ValueError, CalculatorError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+    print(f"{count} results in {elapsed:.2f}s ({count / elapsed if elapsed else 0:,.0f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import math
+import random
+import time
+from expression_engine import MODES, CalculatorError, compile_expression, evaluate, evaluate_code, format_result
+
+
+# (expression, mode, expected display)
+CORRECTNESS_CASES = [
+    ("0.1+0.2", "float", "0.30000000000000004"),
+    ("0.1+0.2", "decimal", "0.3"),
+    ("0.1+0.2", "fraction", "3/10"),
+    ("10/2", "float", "5.0"),
+    ("10/2", "decimal", "5"),
+    ("10/2", "fraction", "5"),
+    ("1/3", "decimal", "0.3333333333333333333333333333"),
+    ("1/3+1/6", "fraction", "1/2"),
+    ("2**-3", "fraction", "1/8"),
+    ("2.50*2", "decimal", "5"),
+    ("-2**2", "fraction", "-4"),
+    ("7//2", "decimal", "3"),
+    ("-7//2", "decimal", "-4"),
+    ("-7.5//2", "decimal", "-4"),
+    ("-7.5//2", "fraction", "-4"),
+    ("0.1*3-0.3", "decimal", "0"),
+    ("(3/2)**-3", "fraction", "8/27"),
+    ("2**100", "decimal", "1267650600228229401496703205376"),
+]
+
+
+def random_integer(rng):
+    return str(rng.randint(1, 999))
+
+
+def random_decimal(rng):
+    return f"{rng.randint(0, 999)}.{rng.randint(0, 99):02d}"
+
+
+def random_expression(rng, operand, operators, size):
+    # a flat chain with the occasional parenthesised pair, like typed calculator input
+    parts = [operand(rng)]
+    for _ in range(size - 1):
+        op = rng.choice(operators)
+        if rng.random() < 0.2:
+            parts.append(f"{op}({operand(rng)}{rng.choice(operators)}{operand(rng)})")
+        else:
+            parts.append(op + operand(rng))
+    return ''.join(parts)
+
+
+def build_workloads(count, size, seed):
+    rng = random.Random(seed)
+    return {
+        "integers + - * //": [random_expression(rng, random_integer, "+-*", size).replace("*", "//", 1)
+                              for _ in range(count)],
+        "integers with /": [random_expression(rng, random_integer, ["+", "-", "*", "/"], size) for _ in range(count)],
+        "decimals + - *": [random_expression(rng, random_decimal, "+-*", size) for _ in range(count)],
+        "decimals with /": [random_expression(rng, random_decimal, ["+", "-", "*", "/"], size) for _ in range(count)],
+    }
+
+
+def check_correctness():
+    failures = 0
+    for text, mode, expected in CORRECTNESS_CASES:
+        got = format_result(evaluate(text, mode=mode))
+        if got != expected:
+            print(f"  {text!r} ({mode}): got {got}, expected {expected}")
+            failures += 1
+
+    # integer-only input never leaves int, so every mode must give the identical value; with
+    # division the exact modes must agree up to the rounding of the decimal context
+    rng = random.Random(7)
+    for i in range(2000):
+        operators = ["+", "-", "*", "//"] if i % 2 else ["+", "-", "*", "/"]
+        text = random_expression(rng, random_integer, operators, rng.randint(1, 8))
+        try:
+            results = {mode: evaluate(text, mode=mode) for mode in MODES}
+        except CalculatorError:
+            continue
+        if i % 2 and len({(type(r), r) for r in results.values()}) != 1:
+            print(f"  modes disagree on {text!r}: {results}")
+            failures += 1
+        elif not math.isclose(results["decimal"], results["fraction"], rel_tol=1e-15, abs_tol=1e-9):
+            print(f"  decimal and fraction disagree on {text!r}: {results}")
+            failures += 1
+    print(f"  {len(CORRECTNESS_CASES)} cases and 2000 random expressions: "
+          f"{'ok' if not failures else f'{failures} FAILED'}")
+    return failures
+
+
+def time_call(func, arg, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def evaluate_all(mode):
+    def run(codes):
+        for code in codes:
+            try:
+                evaluate_code(code, mode=mode)
+            except CalculatorError:
+                pass
+    return run
+
+
+def compile_and_evaluate_all(mode):
+    # bypasses the compile cache, so every expression is tokenized and parsed again
+    compile_uncached = compile_expression.__wrapped__
+
+    def run(texts):
+        for text in texts:
+            try:
+                evaluate_code(compile_uncached(text, mode), mode=mode)
+            except CalculatorError:
+                pass
+    return run
+
+
+def builtin_eval_all(texts):
+    for text in texts:
+        try:
+            eval(text, {"__builtins__": None})
+        except ZeroDivisionError:
+            pass
+
+
+def compile_all(texts, mode):
+    codes = []
+    for text in texts:
+        try:
+            codes.append(compile_expression.__wrapped__(text, mode))
+        except CalculatorError:
+            pass
+    return codes
+
+
+def run_throughput(workloads, repeat):
+    print("\nevaluation of compiled code (k expressions/s)")
+    print(f"{'workload':<22}" + ''.join(f"{mode:>12}" for mode in MODES))
+    for name, texts in workloads.items():
+        row = f"{name:<22}"
+        for mode in MODES:
+            codes = compile_all(texts, mode)
+            row += f"{len(codes) / time_call(evaluate_all(mode), codes, repeat) / 1000:>12.1f}"
+        print(row)
+
+    print("\nparse and evaluate, no cache (k expressions/s)")
+    print(f"{'workload':<22}" + ''.join(f"{mode:>12}" for mode in MODES) + f"{'eval()':>12}")
+    for name, texts in workloads.items():
+        row = f"{name:<22}"
+        for mode in MODES:
+            row += f"{len(texts) / time_call(compile_and_evaluate_all(mode), texts, repeat) / 1000:>12.1f}"
+        row += f"{len(texts) / time_call(builtin_eval_all, texts, repeat) / 1000:>12.1f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the calculator's float, Decimal and Fraction modes")
+    parser.add_argument("--count", type=int, default=20000, help="expressions per workload")
+    parser.add_argument("--size", type=int, default=6, help="operands per expression")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("correctness")
+    failures = check_correctness()
+    run_throughput(build_workloads(args.count, args.size, args.seed), args.repeat)
+    if failures:
+        print(f"\n{failures} correctness failure(s)")
+
+
+if __name__ == "__main__":
+    main()
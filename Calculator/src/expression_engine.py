@@ -0,0 +1,357 @@
+import decimal
+import math
+import operator
+import re
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
+
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)|(?P<name>[A-Za-z_]\w*)'
+                           r'|(?P<op>\*\*|//|[-+*/()]))')
+COMPILE_CACHE_SIZE = 256
+# integers are capped at Python's default int->str conversion limit, so every result can be shown
+MAX_DIGITS = 4300
+MAX_VALUE = 10 ** MAX_DIGITS
+# compiled code is straight-line, so its length is the number of steps evaluation will take
+MAX_STEPS = 10_000
+# Integers are exact in every mode. Float mode follows Python; the exact modes read decimal
+# literals exactly and turn integers into Decimal or Fraction only where a result is not an
+# integer: an inexact division or a negative power. Fraction mode refuses powers with a
+# fractional exponent, whose results are generally irrational.
+MODES = ["float", "decimal", "fraction"]
+DECIMAL_PRECISION = 28
+DECIMAL_CONTEXT = decimal.Context(prec=DECIMAL_PRECISION, Emax=MAX_DIGITS, Emin=-MAX_DIGITS,
+                                  traps=[decimal.InvalidOperation, decimal.DivisionByZero, decimal.Overflow])
+EXACT_TYPES = {"float": None, "decimal": Decimal, "fraction": Fraction}
+
+# opcodes of the postfix bytecode; PUSH carries its operand and LOAD a variable name, the rest act on the stack
+PUSH, LOAD, NEG, ADD, SUB, MUL, DIV, FLOORDIV, POW = range(9)
+BINARY_OPCODES = {'+': ADD, '-': SUB, '*': MUL, '/': DIV, '//': FLOORDIV, '**': POW}
+
+
+def floor_divide(left, right):
+    # Decimal // truncates towards zero; every mode follows Python and floors
+    quotient = left // right
+    if type(quotient) is Decimal and quotient * right != left and (left < 0) != (right < 0):
+        quotient -= 1
+    return quotient
+
+
+BINARY_FUNCTIONS = {ADD: operator.add, SUB: operator.sub, MUL: operator.mul, DIV: operator.truediv,
+                    FLOORDIV: floor_divide, POW: operator.pow}
+
+
+class CalculatorError(Exception):
+    pass
+
+
+class ExpressionSyntaxError(CalculatorError):
+    def __init__(self, message, position=None):
+        super().__init__(message)
+        self.position = position
+
+
+class DivisionByZeroError(CalculatorError):
+    def __init__(self):
+        super().__init__("Cannot divide by zero")
+
+
+class ResultTooLargeError(CalculatorError):
+    def __init__(self, message="Result is too large"):
+        super().__init__(message)
+
+
+class ExpressionTooLongError(CalculatorError):
+    def __init__(self):
+        super().__init__("Expression is too long")
+
+
+class UnknownVariableError(CalculatorError):
+    def __init__(self, name):
+        super().__init__(f"Unknown variable '{name}'")
+        self.name = name
+
+
+class EvaluationCancelledError(CalculatorError):
+    def __init__(self):
+        super().__init__("Calculation was cancelled")
+
+
+class UndefinedResultError(CalculatorError):
+    def __init__(self):
+        super().__init__("Result is not a real number")
+
+
+class InexactResultError(CalculatorError):
+    def __init__(self):
+        super().__init__("Fractional powers have no exact value; use float or decimal mode")
+
+
+def parse_literal(number, mode):
+    if not ('.' in number or 'e' in number or 'E' in number):
+        if len(number.lstrip('0')) > MAX_DIGITS:
+            raise ResultTooLargeError("Number is too large")
+        return int(number)
+    if mode == "float":
+        value = float(number)
+        if math.isinf(value):
+            raise ResultTooLargeError("Number is too large")
+        return value
+    # the exponent is checked first, since an exact 1e999999999 would be built digit by digit
+    value = Decimal(number)
+    if not value:
+        return EXACT_TYPES[mode](0)
+    if abs(value.adjusted()) > MAX_DIGITS or len(value.as_tuple().digits) > MAX_DIGITS:
+        raise ResultTooLargeError("Number is too large")
+    return value if mode == "decimal" else Fraction(value)
+
+
+def tokenize(text, mode="float"):
+    tokens = []
+    position = 0
+    length = len(text)
+    while position < length:
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None or match.end() == position:
+            if text[position:].strip():
+                bad = position + len(text[position:]) - len(text[position:].lstrip())
+                raise ExpressionSyntaxError(f"Unexpected character '{text[bad]}'", bad)
+            break
+        number = match.group('number')
+        if number is not None:
+            tokens.append(('number', parse_literal(number, mode), match.start('number')))
+        elif match.group('name') is not None:
+            tokens.append(('name', match.group('name'), match.start('name')))
+        else:
+            tokens.append(('op', match.group('op'), match.start('op')))
+        position = match.end()
+    return tokens
+
+
+class Parser:
+    # Recursive descent over the calculator grammar with Python's precedence and associativity:
+    #   expression := term (('+' | '-') term)*
+    #   term       := unary (('*' | '/' | '//') unary)*
+    #   unary      := ('+' | '-') unary | power
+    #   power      := atom ('**' unary)?
+    #   atom       := NUMBER | NAME | '(' expression ')'
+    # Code is emitted in postfix order while parsing, so no tree is built.
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+        self.code = []
+
+    def peek(self):
+        return self.tokens[self.index][1] if self.index < len(self.tokens) else None
+
+    def next(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionSyntaxError("Expression is empty", 0)
+        self.expression()
+        if self.index < len(self.tokens):
+            _, value, position = self.tokens[self.index]
+            raise ExpressionSyntaxError(f"Unexpected '{value}'", position)
+        return tuple(self.code)
+
+    def expression(self):
+        self.term()
+        while self.peek() in ('+', '-'):
+            op = self.next()[1]
+            self.term()
+            self.code.append((BINARY_OPCODES[op], None))
+
+    def term(self):
+        self.unary()
+        while self.peek() in ('*', '/', '//'):
+            op = self.next()[1]
+            self.unary()
+            self.code.append((BINARY_OPCODES[op], None))
+
+    def unary(self):
+        op = self.peek()
+        if op in ('+', '-'):
+            self.next()
+            self.unary()
+            if op == '-':
+                self.code.append((NEG, None))
+        else:
+            self.power()
+
+    def power(self):
+        self.atom()
+        if self.peek() == '**':
+            self.next()
+            self.unary()
+            self.code.append((POW, None))
+
+    def atom(self):
+        if self.index >= len(self.tokens):
+            raise ExpressionSyntaxError("Expression is incomplete", None)
+        kind, value, position = self.next()
+        if kind == 'number':
+            self.code.append((PUSH, value))
+        elif kind == 'name':
+            self.code.append((LOAD, value))
+        elif value == '(':
+            self.expression()
+            if self.peek() != ')':
+                raise ExpressionSyntaxError("Missing ')'", position)
+            self.next()
+        else:
+            raise ExpressionSyntaxError(f"Unexpected '{value}'", position)
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_expression(text, mode="float"):
+    # literals are converted for the mode, so each mode caches its own code
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    try:
+        return Parser(tokenize(text, mode)).parse()
+    except RecursionError:
+        raise ExpressionSyntaxError("Expression is nested too deeply") from None
+
+
+def as_integer(value):
+    # whole fractions become ints, so they take the int fast path and its cost estimates
+    if type(value) is Fraction and value.denominator == 1:
+        return value.numerator
+    return value
+
+
+def integer_digits(value):
+    # log10 of the largest integer an exact value is made of; None for floats and Decimals,
+    # whose size is fixed by the float format or the decimal context
+    if type(value) is int:
+        return math.log10(abs(value)) if value else 0
+    if type(value) is Fraction:
+        return math.log10(max(abs(value.numerator), value.denominator))
+    return None
+
+
+def estimated_digits(op, left, right):
+    # log10 of the integers in an exact product, power or fraction sum, worked out from the
+    # operands instead of computing it
+    if op == POW:
+        if type(right) is not int or (right < 0 and type(left) is int):
+            return 0
+        left_digits = integer_digits(left)
+        if not left_digits:
+            return 0
+        if right.bit_length() > 64:
+            return math.inf
+        return abs(right) * left_digits
+    left_digits, right_digits = integer_digits(left), integer_digits(right)
+    if left_digits is None or right_digits is None:
+        return 0
+    return left_digits + right_digits
+
+
+def variable_names(code):
+    # names the code loads, in order of first use
+    return list(dict.fromkeys(arg for op, arg in code if op == LOAD))
+
+
+def apply_binary(op, left, right, exact=None):
+    # Exact multiplication and powers, and sums of fractions, are the only operations whose cost
+    # grows with their result, so they are refused before running when it would exceed
+    # MAX_DIGITS; every other result is checked after the fact, which keeps each step cheap and
+    # the total bounded.
+    left, right = as_integer(left), as_integer(right)
+    if ((op == DIV or op == FLOORDIV) and not right) or (op == POW and not left and right < 0):
+        raise DivisionByZeroError()
+    try:
+        if exact is not None and type(left) is int and type(right) is int:
+            if op == DIV:
+                if not left % right:
+                    return left // right
+                left = exact(left)
+            elif op == POW and right < 0:
+                left = exact(left)
+        if exact is Fraction and op == POW and type(right) is Fraction:
+            # Python would quietly return a float
+            raise InexactResultError()
+        if (op == MUL or op == POW or type(left) is Fraction or type(right) is Fraction) \
+                and estimated_digits(op, left, right) > MAX_DIGITS:
+            raise ResultTooLargeError()
+        result = BINARY_FUNCTIONS[op](left, right)
+    except ZeroDivisionError:
+        raise DivisionByZeroError() from None
+    except (OverflowError, decimal.Overflow):
+        raise ResultTooLargeError() from None
+    except decimal.InvalidOperation:
+        raise UndefinedResultError() from None
+    result_type = type(result)
+    if result_type is int:
+        if abs(result) >= MAX_VALUE:
+            raise ResultTooLargeError()
+    elif result_type is float:
+        if math.isinf(result):
+            raise ResultTooLargeError()
+    elif result_type is Fraction:
+        if max(abs(result.numerator), result.denominator) >= MAX_VALUE:
+            raise ResultTooLargeError()
+    elif result_type is Decimal:
+        # the context traps most invalid results, but 0 to a negative power is an unsignalled Infinity
+        if not result.is_finite():
+            raise UndefinedResultError()
+    elif result_type is complex:
+        # a negative base to a fractional power; no later operator may see it
+        raise UndefinedResultError()
+    return result
+
+
+def run_code(code, variables, cancelled, exact):
+    stack = []
+    push = stack.append
+    for op, arg in code:
+        if cancelled is not None and cancelled():
+            raise EvaluationCancelledError()
+        if op == PUSH:
+            push(arg)
+        elif op == LOAD:
+            if variables is None or arg not in variables:
+                raise UnknownVariableError(arg)
+            push(variables[arg])
+        elif op == NEG:
+            stack[-1] = -stack[-1]
+        else:
+            right = stack.pop()
+            stack[-1] = apply_binary(op, stack[-1], right, exact)
+    return stack[0]
+
+
+def evaluate_code(code, variables=None, max_steps=MAX_STEPS, cancelled=None, mode="float"):
+    if len(code) > max_steps:
+        raise ExpressionTooLongError()
+    exact = EXACT_TYPES[mode]
+    if exact is Decimal:
+        # decimal contexts are per thread; a local one keeps the mode's limits wherever this runs
+        with decimal.localcontext(DECIMAL_CONTEXT):
+            result = run_code(code, variables, cancelled, exact)
+            result = +result if type(result) is Decimal else result
+    else:
+        result = run_code(code, variables, cancelled, exact)
+    if isinstance(result, complex):
+        raise UndefinedResultError()
+    return result
+
+
+def evaluate(text, variables=None, max_steps=MAX_STEPS, cancelled=None, mode="float"):
+    return evaluate_code(compile_expression(text, mode), variables, max_steps, cancelled, mode)
+
+
+def format_result(value):
+    # Decimals drop trailing zeros, so 2.50*2 shows as 5, and whole numbers within the precision
+    # are written out rather than as 1E+2; fractions print as n/d, which reads back as the same value
+    if type(value) is Decimal:
+        value = value.normalize(DECIMAL_CONTEXT)
+        if value.as_tuple().exponent > 0 and value.adjusted() < DECIMAL_PRECISION:
+            return format(value, 'f')
+    return str(value)
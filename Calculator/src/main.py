@@ -1,6 +1,32 @@
-from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QGridLayout, QPushButton, QLineEdit
-from PyQt6.QtCore import Qt
+import time
+from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QGridLayout, QPushButton, QLineEdit, QComboBox
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
+from expression_engine import MODES, CalculatorError, evaluate, format_result
+
+
+EVALUATION_TIMEOUT = 2.0
+POLL_INTERVAL_MS = 25
+
+
+class EvaluationWorker(QThread):
+    finished_result = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, expression, mode, parent=None):
+        super().__init__(parent)
+        self.expression = expression
+        self.mode = mode
+
+    def run(self):
+        try:
+            result = evaluate(self.expression, cancelled=self.isInterruptionRequested, mode=self.mode)
+            self.finished_result.emit(format_result(result))
+        except CalculatorError as e:
+            self.failed.emit(str(e))
+        except Exception:
+            # an engine bug must still end the calculation, or the display would wait forever
+            self.failed.emit("Result is undefined")
 
 
 class Calculator(QWidget):
@@ -10,6 +36,11 @@ class Calculator(QWidget):
         self.setGeometry(100, 100, 350, 500)
         self.current_expression = ""
         self.error_state = False
+        self.worker = None
+        self.deadline = 0.0
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setInterval(POLL_INTERVAL_MS)
+        self.timeout_timer.timeout.connect(self.check_timeout)
         self.init_ui()
 
     def init_ui(self):
@@ -72,10 +103,21 @@ class Calculator(QWidget):
             button.clicked.connect(lambda checked, t=text: self.on_button_click(t))
             grid_layout.addWidget(button, row, col)
 
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems([mode.capitalize() for mode in MODES])
+        self.mode_combo.setFont(QFont("Arial", 12))
+        self.mode_combo.setToolTip("Arithmetic mode: float, exact decimal or exact fraction")
+        self.mode_combo.setStyleSheet(
+            "QComboBox { background-color: #6b6b6b; color: white; border-radius: 5px; padding: 15px; }"
+        )
+        grid_layout.addWidget(self.mode_combo, 5, 3)
+
         layout.addLayout(grid_layout)
         self.setLayout(layout)
 
     def on_button_click(self, char):
+        if self.worker is not None:
+            return
         if self.error_state:
             self.current_expression = ""
             self.error_state = False
@@ -86,24 +128,51 @@ class Calculator(QWidget):
             self.current_expression = self.current_expression[:-1] if self.current_expression else ""
         elif char == '=':
             self.evaluate_expression()
+            return
         else:
             self.current_expression += char
 
         self.display.setText(self.current_expression)
 
     def evaluate_expression(self):
-        try:
-            result = eval(self.current_expression, {"__builtins__": None})
-            self.current_expression = str(result)
-        except ZeroDivisionError:
-            self.current_expression = "Cannot divide by zero"
-            self.error_state = True
-        except Exception:
-            self.current_expression = "Result is undefined"
-            self.error_state = True
-
+        # The engine refuses over-budget input before doing the work, so results normally arrive
+        # within milliseconds; the worker and its deadline keep the window responsive regardless.
+        self.worker = EvaluationWorker(self.current_expression, MODES[self.mode_combo.currentIndex()], self)
+        self.worker.finished_result.connect(self.on_result)
+        self.worker.failed.connect(self.on_failed)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.deadline = time.monotonic() + EVALUATION_TIMEOUT
+        self.timeout_timer.start()
+        self.worker.start()
+
+    def check_timeout(self):
+        if self.worker is not None and time.monotonic() > self.deadline:
+            # the worker stops at its next step; its late result is no longer wanted
+            self.worker.requestInterruption()
+            self.worker.finished_result.disconnect()
+            self.worker.failed.disconnect()
+            self.on_failed("Calculation took too long")
+
+    def on_result(self, text):
+        self.finish_evaluation(text, error=False)
+
+    def on_failed(self, message):
+        self.finish_evaluation(message, error=True)
+
+    def finish_evaluation(self, text, error):
+        self.timeout_timer.stop()
+        self.worker = None
+        self.current_expression = text
+        self.error_state = error
         self.display.setText(self.current_expression)
 
+    def closeEvent(self, event):
+        # workers abandoned after a timeout may still be finishing their last step
+        for worker in self.findChildren(EvaluationWorker):
+            worker.requestInterruption()
+            worker.wait()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
     app = QApplication([])
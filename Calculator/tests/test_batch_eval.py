@@ -0,0 +1,34 @@
+import math
+import pytest
+from batch_eval import evaluate_csv
+from expression_engine import UnknownVariableError
+
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "data.csv"
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_quoted_commas_and_empty_cells_in_other_columns(tmp_path):
+    path = write_csv(tmp_path, 'name,a,b,note\n"Smith, John",1,2,\n"Doe, Jane",3,4.5,"x, y"\n\n')
+    assert evaluate_csv(path, "a + b").tolist() == [3.0, 7.5]
+
+
+def test_empty_cell_in_a_used_column_is_missing(tmp_path):
+    path = write_csv(tmp_path, 'a,b\n1,\n2,3\n4\n')
+    values = evaluate_csv(path, "a * b")
+    assert math.isnan(values[0]) and values[1] == 6.0 and math.isnan(values[2])
+
+
+def test_text_in_a_used_column_is_an_error(tmp_path):
+    path = write_csv(tmp_path, 'a,b\n1,2\n3,four\n')
+    with pytest.raises(ValueError, match="line 3, column b"):
+        evaluate_csv(path, "a + b")
+
+
+def test_unknown_column_and_constant_expression(tmp_path):
+    path = write_csv(tmp_path, 'a\n1\n2\n')
+    with pytest.raises(UnknownVariableError):
+        evaluate_csv(path, "a + c")
+    assert evaluate_csv(path, "2 ** 3").tolist() == [8.0, 8.0]
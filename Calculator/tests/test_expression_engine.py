@@ -0,0 +1,22 @@
+from fractions import Fraction
+import pytest
+from expression_engine import InexactResultError, evaluate
+
+
+@pytest.mark.parametrize("expression,expected", [
+    ("1/3 + 1/6", Fraction(1, 2)),
+    ("0.1 + 0.2", Fraction(3, 10)),
+    ("(2/3) ** 3", Fraction(8, 27)),
+    ("(2/3) ** -2", Fraction(9, 4)),
+    ("2 ** (4/2)", 4),
+])
+def test_fraction_mode_is_exact(expression, expected):
+    result = evaluate(expression, mode="fraction")
+    assert result == expected and not isinstance(result, float)
+
+
+@pytest.mark.parametrize("expression", ["2 ** 0.5", "(1/4) ** (1/2)", "8 ** (1/3)"])
+def test_fraction_mode_refuses_fractional_powers(expression):
+    with pytest.raises(InexactResultError):
+        evaluate(expression, mode="fraction")
+    assert isinstance(evaluate(expression), float)
@@ -0,0 +1,104 @@
+import re
+from collections import Counter, defaultdict, namedtuple
+
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,7}\b')
+
+# second-level suffixes under which the company name is the third label, e.g. bbc.co.uk
+MULTI_PART_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk", "me.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "co.jp", "ne.jp", "or.jp", "ac.jp",
+    "com.br", "com.cn", "com.tw", "com.hk", "com.sg", "com.my", "com.mx",
+    "com.ar", "com.tr", "co.in", "co.za", "co.kr", "co.il", "com.ua",
+}
+
+AddressRecord = namedtuple("AddressRecord", ["email", "username", "domain", "company"])
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def registrable_domain(domain):
+    labels = domain.split('.')
+    if len(labels) >= 3 and '.'.join(labels[-2:]) in MULTI_PART_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def make_record(email):
+    email = normalize_email(email)
+    username, domain = email.rsplit('@', 1)
+    company = registrable_domain(domain).split('.')[0]
+    return AddressRecord(email, username, domain, company)
+
+
+class AddressIndex:
+    def __init__(self, emails=()):
+        self.records = {}
+        self.hits = Counter()
+        # dicts rather than lists so removals stay O(1) while keeping insertion order
+        self.domains = defaultdict(dict)
+        self.companies = defaultdict(dict)
+        self.add_all(emails)
+
+    def add(self, email):
+        key = normalize_email(email)
+        self.hits[key] += 1
+        record = self.records.get(key)
+        if record is None:
+            record = make_record(key)
+            self.records[key] = record
+            self.domains[record.domain][key] = None
+            self.companies[record.company][key] = None
+        return record
+
+    def remove(self, email):
+        key = normalize_email(email)
+        if self.hits[key] > 1:
+            self.hits[key] -= 1
+            return
+        self.hits.pop(key, None)
+        record = self.records.pop(key, None)
+        if record is None:
+            return
+        for groups, group in ((self.domains, record.domain), (self.companies, record.company)):
+            del groups[group][key]
+            if not groups[group]:
+                del groups[group]
+
+    def add_all(self, emails):
+        for email in emails:
+            self.add(email)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def __contains__(self, email):
+        return normalize_email(email) in self.records
+
+    def get(self, email):
+        return self.records.get(normalize_email(email))
+
+    def emails(self):
+        return list(self.records)
+
+    def by_domain(self, domain):
+        return [self.records[key] for key in self.domains.get(domain, ())]
+
+    def by_company(self, company):
+        return [self.records[key] for key in self.companies.get(company, ())]
+
+    def domain_counts(self):
+        return Counter({domain: len(keys) for domain, keys in self.domains.items()})
+
+    def company_counts(self):
+        return Counter({company: len(keys) for company, keys in self.companies.items()})
+
+
+def extract_addresses(text):
+    return AddressIndex(EMAIL_PATTERN.findall(text))
@@ -0,0 +1,238 @@
+import argparse
+import random
+import re
+import string
+import time
+from address_index import EMAIL_PATTERN
+
+
+LEGACY_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b'
+FIXED_TLD_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,7}\b'
+LABELS_PATTERN = r'\b[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,7}\b'
+
+LOCAL_CHARS = frozenset(string.ascii_letters + string.digits + "._%+-")
+
+# (text, expected matches) for the intended semantics: ASCII TLD of 2-7 letters
+CORRECTNESS_CASES = [
+    ("Contact us at john@doe.com or support@doe.com",
+     ["john@doe.com", "support@doe.com"]),
+    ("mail john.doe+tag@sub.example.co.uk.", ["john.doe+tag@sub.example.co.uk"]),
+    ("(support@doe.com)", ["support@doe.com"]),
+    ("first@a.com,second@b.org;third@c.net", ["first@a.com", "second@b.org", "third@c.net"]),
+    (".john@x.com", ["john@x.com"]),
+    ("x@foo@bar.com", ["foo@bar.com"]),
+    ("user@host", []),
+    ("a@b.c", []),
+    ("x@y.toolongtld", []),
+    ("weird@x.c|m", []),
+    ("pipe@x.|o", []),
+    ("UPPER@CASE.ORG", ["UPPER@CASE.ORG"]),
+    ("no address here", []),
+]
+
+
+class RegexEngine:
+    def __init__(self, name, pattern, module=re):
+        self.name = name
+        self.pattern = pattern
+        self.compiled = module.compile(pattern)
+
+    def findall(self, text):
+        return self.compiled.findall(text)
+
+
+class AnchoredEngine:
+    # Scans for '@' and makes a single match attempt per '@'. Every start position inside the
+    # local-part run before an '@' reaches the same '@' and the same domain, so they all succeed
+    # or fail together; trying only the first word boundary keeps results identical to findall
+    # while avoiding the quadratic rescans the plain regex does on long dotted runs.
+    def __init__(self, name, pattern):
+        self.name = name
+        self.pattern = pattern
+        self.compiled = re.compile(pattern)
+
+    def findall(self, text):
+        match = self.compiled.match
+        results = []
+        last_end = 0
+        at = text.find('@')
+        while at != -1:
+            left = at
+            while left > last_end and text[left - 1] in LOCAL_CHARS:
+                left -= 1
+            start = left
+            while start < at and not is_boundary(text, start):
+                start += 1
+            if start < at:
+                m = match(text, start)
+                if m:
+                    results.append(m.group())
+                    last_end = m.end()
+                    at = text.find('@', last_end)
+                    continue
+            at = text.find('@', at + 1)
+        return results
+
+
+def is_boundary(text, i):
+    before = i > 0 and (text[i - 1].isalnum() or text[i - 1] == '_')
+    after = text[i].isalnum() or text[i] == '_'
+    return before != after
+
+
+def build_engines():
+    engines = [
+        RegexEngine("re legacy", LEGACY_PATTERN),
+        RegexEngine("re fixed TLD", FIXED_TLD_PATTERN),
+        RegexEngine("re dot labels", LABELS_PATTERN),
+        AnchoredEngine("anchored fixed TLD", FIXED_TLD_PATTERN),
+    ]
+    try:
+        import regex
+        engines.append(RegexEngine("regex fixed TLD", FIXED_TLD_PATTERN, regex))
+    except ImportError:
+        pass
+    try:
+        import re2
+        engines.append(RegexEngine("re2 fixed TLD", FIXED_TLD_PATTERN, re2))
+    except ImportError:
+        pass
+    return engines
+
+
+def random_address(rng):
+    user = ''.join(rng.choices(string.ascii_lowercase + string.digits + "._", k=rng.randint(3, 12)))
+    host = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+    tld = rng.choice(["com", "org", "net", "io", "co.uk", "de", "museum"])
+    return f"{user.strip('._') or 'x'}@{host}.{tld}"
+
+
+def random_word(rng):
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+
+
+def generate_text(rng, size, address_every):
+    words = []
+    length = 0
+    while length < size:
+        word = random_address(rng) if rng.randrange(address_every) == 0 else random_word(rng)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def generate_dots_and_dashes(rng, size):
+    parts = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.1:
+            part = random_address(rng)
+        else:
+            part = rng.choice([".", "-", "a.", "a-", "..", "--"]) * rng.randint(50, 500)
+        parts.append(part)
+        length += len(part) + 1
+    return ' '.join(parts)
+
+
+def build_corpora(size, seed):
+    rng = random.Random(seed)
+    return {
+        "dense (1 in 5 words)": generate_text(rng, size, 5),
+        "sparse (1 in 2000 words)": generate_text(rng, size, 2000),
+        "dot/dash runs": generate_dots_and_dashes(rng, size),
+    }
+
+
+def adversarial_inputs(length):
+    half = length // 2
+    return {
+        "a.a.a... no @": "a." * half,
+        "x@a.a.a... no TLD": "x@" + "a." * half + "!",
+        "a-a-a...@ dead end": "a-" * half + "@!",
+        "@@@...": "@" * length,
+    }
+
+
+def check_correctness(engines):
+    reference = engines[1]
+    failures = 0
+    for engine in engines:
+        wrong = [(text, engine.findall(text), expected) for text, expected in CORRECTNESS_CASES
+                 if engine.findall(text) != expected]
+        status = "ok" if not wrong else f"{len(wrong)} FAILED"
+        print(f"  {engine.name:<22} {status}")
+        for text, got, expected in wrong:
+            print(f"      {text!r}: got {got}, expected {expected}")
+        failures += len(wrong)
+
+    # engines running the reference pattern must agree with it exactly on random inputs
+    same_pattern = [engine for engine in engines if engine is not reference and engine.pattern == reference.pattern]
+    rng = random.Random(7)
+    alphabet = ["a", "B", "1", ".", "-", "_", "@", " ", ",", "|", "com", "x@y.org"]
+    for _ in range(2000):
+        text = ''.join(rng.choices(alphabet, k=rng.randint(1, 30)))
+        expected = reference.findall(text)
+        for engine in same_pattern:
+            if engine.findall(text) != expected:
+                print(f"  {engine.name} disagrees with {reference.name} on {text!r}")
+                failures += 1
+    return failures
+
+
+def time_call(func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_throughput(engines, corpora, repeat):
+    print(f"\n{'corpus':<26}" + ''.join(f"{engine.name:>22}" for engine in engines))
+    for corpus_name, text in corpora.items():
+        megabytes = len(text) / 1e6
+        row = f"{corpus_name:<26}"
+        for engine in engines:
+            row += f"{megabytes / time_call(engine.findall, text, repeat):>17.1f} MB/s"
+        print(row)
+
+
+def run_worst_case(engines, lengths, budget):
+    print(f"\nworst-case latency (ms), engines over {budget:g}s are skipped at larger sizes")
+    print(f"{'input':<24}{'chars':>8}" + ''.join(f"{engine.name:>22}" for engine in engines))
+    slow = set()
+    for length in lengths:
+        for input_name, text in adversarial_inputs(length).items():
+            row = f"{input_name:<24}{length:>8}"
+            for engine in engines:
+                if engine.name in slow:
+                    row += f"{'skipped':>22}"
+                    continue
+                elapsed = time_call(engine.findall, text, 1)
+                if elapsed > budget:
+                    slow.add(engine.name)
+                row += f"{elapsed * 1000:>22.2f}"
+            print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and check candidate email extraction engines")
+    parser.add_argument("--size", type=float, default=1.0, help="corpus size in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds before an engine is skipped")
+    args = parser.parse_args()
+
+    engines = build_engines()
+    print(f"app pattern: {EMAIL_PATTERN.pattern}")
+    print("\ncorrectness")
+    failures = check_correctness(engines)
+    run_throughput(engines, build_corpora(int(args.size * 1e6), args.seed), args.repeat)
+    run_worst_case(engines, [1000, 5000, 20000, 100000], args.budget)
+    if failures:
+        print(f"\n{failures} correctness failure(s)")
+
+
+if __name__ == "__main__":
+    main()
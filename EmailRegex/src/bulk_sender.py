@@ -0,0 +1,247 @@
+import argparse
+import queue
+import smtplib
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+
+SendResult = namedtuple("SendResult", ["recipient", "ok", "attempts", "error"])
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    # Token bucket. It starts with a single token and by default holds no more, so sends are spaced
+    # 1/rate apart from the very first one instead of starting with a burst.
+    def __init__(self, rate, burst=1.0):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = min(1.0, burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def get_rate_limiter(host, port, rate):
+    # limiters are shared per server so concurrent batches to the same host respect one budget
+    with _rate_limiters_lock:
+        key = (host, port)
+        limiter = _rate_limiters.get(key)
+        if limiter is None or limiter.rate != rate:
+            limiter = RateLimiter(rate)
+            _rate_limiters[key] = limiter
+        return limiter
+
+
+class SMTPConnectionPool:
+    def __init__(self, host, port, username=None, password=None, size=4, use_tls=True, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    def acquire(self):
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self.lock:
+                if self.created < self.size:
+                    self.created += 1
+                    break
+            try:
+                return self.idle.get(timeout=1)
+            except queue.Empty:
+                continue
+        try:
+            return self.connect()
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+
+    def release(self, server, broken=False):
+        if broken:
+            with self.lock:
+                self.created -= 1
+            try:
+                server.close()
+            except Exception:
+                pass
+        else:
+            self.idle.put(server)
+
+    def close(self):
+        while True:
+            try:
+                server = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+            with self.lock:
+                self.created -= 1
+
+
+def is_reusable(error):
+    # a refused recipient or message leaves the session usable, except a 421 reply, with which the
+    # server says it is closing the connection; anything else may have broken it
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code != 421 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code != 421
+    return False
+
+
+def is_transient(error):
+    # SMTPException derives from OSError, so SMTP errors are judged by their reply codes first;
+    # only a dropped connection or a network error outside SMTP is worth retrying as such
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPException):
+        return isinstance(error, smtplib.SMTPServerDisconnected)
+    return isinstance(error, OSError)
+
+
+class BulkSender:
+    def __init__(self, pool, workers=4, rate=None, retries=3, backoff=0.5):
+        self.pool = pool
+        self.workers = min(workers, pool.size)
+        self.limiter = get_rate_limiter(pool.host, pool.port, rate) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+
+    def send_one(self, msg):
+        recipient = msg['To']
+        error = None
+        for attempt in range(1, self.retries + 2):
+            if self.limiter:
+                self.limiter.acquire()
+            server = None
+            try:
+                server = self.pool.acquire()
+                server.send_message(msg)
+                self.pool.release(server)
+                return SendResult(recipient, True, attempt, None)
+            except Exception as e:
+                error = e
+                if server is not None:
+                    self.pool.release(server, broken=not is_reusable(e))
+                if not is_transient(e) or attempt > self.retries:
+                    break
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+        return SendResult(recipient, False, attempt, str(error))
+
+    def send_all(self, messages, progress=None):
+        messages = list(messages)
+        results = [None] * len(messages)
+        done = 0
+        done_lock = threading.Lock()
+
+        def run(index):
+            nonlocal done
+            results[index] = self.send_one(messages[index])
+            with done_lock:
+                done += 1
+                if progress:
+                    progress(done, len(messages))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(run, range(len(messages))))
+        return results
+
+
+def build_messages(sender, recipients, subject, body):
+    messages = []
+    for recipient in recipients:
+        msg = EmailMessage()
+        msg['Subject'] = subject
+        msg['From'] = sender
+        msg['To'] = recipient
+        msg.set_content(body)
+        messages.append(msg)
+    return messages
+
+
+def run_benchmark(count, workers, rate, port):
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        print("The benchmark needs aiosmtpd: pip install aiosmtpd")
+        return
+
+    class SinkHandler:
+        def __init__(self):
+            self.received = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            self.received += len(envelope.rcpt_tos)
+            return '250 OK'
+
+    handler = SinkHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    try:
+        recipients = [f"user{i}@example.com" for i in range(count)]
+        messages = build_messages("bench@example.com", recipients, "Benchmark", "Hello from the bulk sender.")
+        pool = SMTPConnectionPool('127.0.0.1', port, size=workers, use_tls=False)
+        sender = BulkSender(pool, workers=workers, rate=rate)
+        start = time.perf_counter()
+        results = sender.send_all(messages)
+        elapsed = time.perf_counter() - start
+        pool.close()
+    finally:
+        controller.stop()
+
+    sent = sum(1 for r in results if r.ok)
+    print(f"Sent {sent}/{count} messages with {workers} workers in {elapsed:.2f}s "
+          f"({sent / elapsed:.0f} msg/s), server received {handler.received}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk sending against a local aiosmtpd sink")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=None, help="messages per second per server")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+    for workers in sorted({1, args.workers}):
+        run_benchmark(args.count, workers, args.rate, args.port)
+
+
+if __name__ == "__main__":
+    main()
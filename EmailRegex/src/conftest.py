@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# the modules import each other by bare name, as when run from this directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,49 @@
+import csv
+import gzip
+import io
+from datetime import datetime
+from contact_store import ContactStore
+
+
+CSV_COLUMNS = ["email", "username", "domain", "company", "first_seen"]
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def open_export_file(file_path, compress=None):
+    if compress is None:
+        compress = file_path.endswith('.gz')
+    if compress:
+        raw = gzip.GzipFile(file_path, 'wb', compresslevel=6)
+        buffered = io.BufferedWriter(raw, buffer_size=WRITE_BUFFER_SIZE)
+        return io.TextIOWrapper(buffered, encoding='utf-8', newline='')
+    return open(file_path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE)
+
+
+def export_contacts(db_path, file_path, compress=None, progress=None, batch_size=50000):
+    # opens its own connection so it can run on a worker thread
+    store = ContactStore(db_path)
+    try:
+        total = len(store)
+        written = 0
+        # contacts saved together share a timestamp, so formatting is memoized per value
+        formatted = {}
+        with open_export_file(file_path, compress) as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for rows in store.iter_record_batches(batch_size):
+                out = []
+                for email, username, domain, company, first_seen in rows:
+                    seen = formatted.get(first_seen)
+                    if seen is None:
+                        if len(formatted) > 10000:
+                            formatted.clear()
+                        seen = datetime.fromtimestamp(first_seen).isoformat(timespec='seconds')
+                        formatted[first_seen] = seen
+                    out.append((email, username, domain, company, seen))
+                writer.writerows(out)
+                written += len(rows)
+                if progress:
+                    progress(written, total)
+        return written
+    finally:
+        store.close()
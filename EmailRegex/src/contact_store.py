@@ -0,0 +1,101 @@
+import json
+import os
+import sqlite3
+import time
+from address_index import make_record, normalize_email
+
+
+SQLITE_MAX_PARAMS = 500
+
+
+class ContactStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+    def create_schema(self):
+        # email is the primary key of a WITHOUT ROWID table, so the address index is the table itself
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS contacts (
+                email TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                company TEXT NOT NULL,
+                first_seen REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_contacts_domain ON contacts(domain);
+            CREATE INDEX IF NOT EXISTS idx_contacts_username ON contacts(username);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def __bool__(self):
+        return self.conn.execute("SELECT 1 FROM contacts LIMIT 1").fetchone() is not None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def __contains__(self, email):
+        row = self.conn.execute("SELECT 1 FROM contacts WHERE email = ?", (normalize_email(email),)).fetchone()
+        return row is not None
+
+    def contains_many(self, emails):
+        emails = list({normalize_email(email) for email in emails})
+        found = set()
+        for i in range(0, len(emails), SQLITE_MAX_PARAMS):
+            chunk = emails[i:i + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT email FROM contacts WHERE email IN ({placeholders})", chunk)
+            found.update(row[0] for row in rows)
+        return found
+
+    def add_many(self, emails):
+        now = time.time()
+        rows = ((*make_record(email), now) for email in emails)
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO contacts (email, username, domain, company, first_seen) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+        return self.conn.total_changes - before
+
+    def add(self, email):
+        return self.add_many([email]) == 1
+
+    def find_by_domain(self, domain):
+        rows = self.conn.execute("SELECT email FROM contacts WHERE domain = ?", (domain,))
+        return [row[0] for row in rows]
+
+    def find_by_username(self, username):
+        rows = self.conn.execute("SELECT email FROM contacts WHERE username = ?", (username,))
+        return [row[0] for row in rows]
+
+    def iter_emails(self, batch_size=10000):
+        cursor = self.conn.execute("SELECT email FROM contacts")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row[0]
+
+    def iter_record_batches(self, batch_size=50000):
+        cursor = self.conn.execute("SELECT email, username, domain, company, first_seen FROM contacts")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+    def migrate_json(self, json_path):
+        if not os.path.exists(json_path):
+            return 0
+        with open(json_path, 'r') as f:
+            emails = json.load(f)
+        added = self.add_many(email for email in emails if '@' in email)
+        os.replace(json_path, json_path + ".migrated")
+        return added
@@ -0,0 +1,117 @@
+import bisect
+import re
+from address_index import AddressIndex, EMAIL_PATTERN, normalize_email
+
+
+WHITESPACE = re.compile(r'\s')
+WIDE_CHARACTER = re.compile('[\U00010000-\U0010FFFF]')
+
+
+def utf16_to_index(text, offset):
+    # Qt positions count UTF-16 code units, in which characters beyond the BMP (emoji) take two;
+    # this is the str index of the same place in text, clamped to its end
+    if text.isascii():
+        return min(offset, len(text))
+    return len(text.encode('utf-16-le')[:2 * offset].decode('utf-16-le', 'ignore'))
+
+
+def utf16_length(text):
+    return len(text) + sum(1 for _ in WIDE_CHARACTER.finditer(text))
+
+
+class Utf16Offsets:
+    # Keeps the UTF-16 positions of the characters that take two code units, so a Qt position
+    # becomes a str index by counting those before it; an edit only reads the inserted text and
+    # shifts the positions after it, never the whole document.
+    def __init__(self):
+        self.wide = []
+        self.length = 0
+
+    def reset(self, text):
+        self.wide = self.wide_positions(text, 0)
+        self.length = utf16_length(text)
+
+    @staticmethod
+    def wide_positions(text, base):
+        return [base + match.start() + i for i, match in enumerate(WIDE_CHARACTER.finditer(text))]
+
+    def to_index(self, offset):
+        return offset - bisect.bisect_left(self.wide, offset)
+
+    def note_change(self, position, inserted, length):
+        # Qt's position, the text now at it and the new document length in UTF-16 units; returns
+        # the str index, characters removed and characters added. The removed length follows from
+        # the change in length, as Qt may count the document's final separator on both sides.
+        units = utf16_length(inserted)
+        removed = self.length - length + units
+        self.length = length
+        first = bisect.bisect_left(self.wide, position)
+        last = bisect.bisect_left(self.wide, position + removed)
+        shift = units - removed
+        self.wide[first:] = self.wide_positions(inserted, position) + [p + shift for p in self.wide[last:]]
+        return position - first, removed - (last - first), len(inserted)
+
+
+class IncrementalExtractor:
+    # Matches never contain whitespace, so rescanning from one whitespace boundary to the next
+    # around an edit finds exactly the matches the edit can have created or destroyed.
+    def __init__(self, margin=64):
+        self.margin = margin
+        self.starts = []
+        self.emails = []
+        self.index = AddressIndex()
+        self.dirty = None
+
+    def reset(self, text):
+        self.starts = []
+        self.emails = []
+        self.index = AddressIndex()
+        self.dirty = None
+        for match in EMAIL_PATTERN.finditer(text):
+            self.starts.append(match.start())
+            self.emails.append(match.group())
+            self.index.add(match.group())
+
+    def note_change(self, position, removed, added):
+        # coalesce edits into one dirty range [lo, hi) in current coordinates plus the net length change
+        if self.dirty is None:
+            self.dirty = (position, position + added, added - removed)
+            return
+        lo, hi, delta = self.dirty
+        self.dirty = (min(lo, position), max(hi, position + removed) + added - removed, delta + added - removed)
+
+    def flush(self, text):
+        # rescans the dirty range; returns the records that entered the index and the emails that left it
+        if self.dirty is None:
+            return [], []
+        lo, hi, delta = self.dirty
+        self.dirty = None
+
+        lo = max(0, lo - self.margin)
+        while lo > 0 and not text[lo - 1].isspace():
+            lo -= 1
+        hi = min(len(text), hi + self.margin)
+        boundary = WHITESPACE.search(text, hi)
+        hi = boundary.start() if boundary else len(text)
+        old_hi = hi - delta
+
+        first = bisect.bisect_left(self.starts, lo)
+        last = bisect.bisect_left(self.starts, old_hi)
+        new_matches = list(EMAIL_PATTERN.finditer(text, lo, hi))
+        new_starts = [match.start() for match in new_matches]
+        new_emails = [match.group() for match in new_matches]
+        touched = dict.fromkeys(normalize_email(email) for email in self.emails[first:last] + new_emails)
+        before = {key for key in touched if key in self.index.records}
+        for email in self.emails[first:last]:
+            self.index.remove(email)
+        for email in new_emails:
+            self.index.add(email)
+
+        tail = self.starts[last:]
+        if delta:
+            tail = [start + delta for start in tail]
+        self.starts[first:] = new_starts + tail
+        self.emails[first:last] = new_emails
+        added = [self.index.records[key] for key in touched if key not in before and key in self.index.records]
+        removed = [key for key in touched if key in before and key not in self.index.records]
+        return added, removed
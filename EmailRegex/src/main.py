@@ -1,26 +1,69 @@
 import sys
-import re
-import json
 import os
-import smtplib
-from email.message import EmailMessage
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QLabel, QTextEdit, QPushButton, QHBoxLayout,
-                             QFrame, QMessageBox, QListWidget, QDialog,
-                             QLineEdit, QDialogButtonBox, QFileDialog)
-from PyQt6.QtCore import Qt, QTimer
+                             QFrame, QMessageBox, QListWidget, QListWidgetItem, QDialog,
+                             QLineEdit, QDialogButtonBox, QFileDialog, QSpinBox,
+                             QCheckBox)
+from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal
+from contact_store import ContactStore
+from address_index import AddressIndex, EMAIL_PATTERN
+from incremental_extractor import IncrementalExtractor, Utf16Offsets, utf16_length, utf16_to_index
+from bulk_sender import SMTPConnectionPool, BulkSender, build_messages
+from contact_export import export_contacts
+
+
+class BulkSendWorker(QThread):
+    progress = pyqtSignal(int, int)
+    finished_sending = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+    def __init__(self, sender, messages, parent=None):
+        super().__init__(parent)
+        self.sender = sender
+        self.messages = messages
+
+    def run(self):
+        try:
+            results = self.sender.send_all(self.messages, progress=self.progress.emit)
+            self.finished_sending.emit(results)
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            self.sender.pool.close()
+
+
+class ExportWorker(QThread):
+    progress = pyqtSignal(int, int)
+    finished_export = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_path, file_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            written = export_contacts(self.db_path, self.file_path, progress=self.progress.emit)
+            self.finished_export.emit(written)
+        except Exception as e:
+            self.failed.emit(str(e))
 
 
 class EmailSenderDialog(QDialog):
-    def __init__(self, recipient, parent=None):
+    def __init__(self, recipients, parent=None):
         super().__init__(parent)
-        self.recipient = recipient
+        self.recipients = recipients
         self.setWindowTitle("Send Email")
         self.setMinimumSize(500, 500)
 
         layout = QVBoxLayout(self)
 
-        layout.addWidget(QLabel(f"To: {recipient}"))
+        to_text = ", ".join(recipients[:3])
+        if len(recipients) > 3:
+            to_text += f" and {len(recipients) - 3} more"
+        layout.addWidget(QLabel(f"To: {to_text}"))
 
         layout.addWidget(QLabel("Subject:"))
         self.subject_input = QLineEdit()
@@ -47,6 +90,19 @@ class EmailSenderDialog(QDialog):
         self.password.setEchoMode(QLineEdit.EchoMode.Password)
         layout.addWidget(self.password)
 
+        limits_layout = QHBoxLayout()
+        limits_layout.addWidget(QLabel("Connections:"))
+        self.connections = QSpinBox()
+        self.connections.setRange(1, 16)
+        self.connections.setValue(4)
+        limits_layout.addWidget(self.connections)
+        limits_layout.addWidget(QLabel("Max emails/sec:"))
+        self.rate_limit = QSpinBox()
+        self.rate_limit.setRange(1, 1000)
+        self.rate_limit.setValue(5)
+        limits_layout.addWidget(self.rate_limit)
+        layout.addLayout(limits_layout)
+
         button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         button_box.accepted.connect(self.accept)
         button_box.rejected.connect(self.reject)
@@ -65,8 +121,19 @@ class EmailExtractorApp(QMainWindow):
         self.main_layout.setSpacing(15)
         self.main_layout.setContentsMargins(20, 20, 20, 20)
 
-        self.contacts_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contacts.json")
-        self.saved_contacts = set()
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.contacts_file = os.path.join(base_dir, "contacts.json")
+        self.contacts_db = os.path.join(base_dir, "contacts.db")
+        self.saved_contacts = ContactStore(self.contacts_db)
+        self.address_index = AddressIndex()
+        self.live_extractor = IncrementalExtractor()
+        self.live_offsets = Utf16Offsets()
+        # list item of each email shown, so live updates touch only the rows that change
+        self.list_items = {}
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(150)
+        self.live_timer.timeout.connect(self.refresh_live_results)
         self.load_contacts()
 
         self.setup_ui()
@@ -103,6 +170,10 @@ class EmailExtractorApp(QMainWindow):
         extract_btn.clicked.connect(self.extract_emails)
         input_layout.addWidget(extract_btn)
 
+        self.live_checkbox = QCheckBox("Live mode (update results while typing)")
+        self.live_checkbox.toggled.connect(self.toggle_live_mode)
+        input_layout.addWidget(self.live_checkbox)
+
         self.main_layout.addLayout(input_layout)
 
         results_frame = QFrame()
@@ -110,10 +181,10 @@ class EmailExtractorApp(QMainWindow):
         results_layout = QVBoxLayout(results_frame)
         results_layout.setSpacing(10)
 
-        results_title = QLabel("Extracted Email Addresses")
-        results_title.setObjectName("resultsTitle")
-        results_title.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        results_layout.addWidget(results_title)
+        self.results_title = QLabel("Extracted Email Addresses")
+        self.results_title.setObjectName("resultsTitle")
+        self.results_title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        results_layout.addWidget(self.results_title)
 
         self.emails_list = QListWidget()
         self.emails_list.setObjectName("emailsList")
@@ -149,107 +220,188 @@ class EmailExtractorApp(QMainWindow):
             self.show_error("Please enter text containing email addresses.")
             return
 
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b'
-        emails = re.findall(email_pattern, text)
+        index = AddressIndex(EMAIL_PATTERN.findall(text))
 
-        if not emails:
+        if not index:
             self.show_error("No valid email addresses found.")
             return
 
-        self.emails_list.clear()
-
-        for email in self.saved_contacts:
-            username, domain = email.split('@')
-            domain_name = domain.split('.')[0]
-            list_item = f"Email: {email} | Username: {username} | Company: {domain_name} [Saved]"
-            self.emails_list.addItem(list_item)
-
-        for email in emails:
-            if email not in self.saved_contacts:
-                username, domain = email.split('@')
-                domain_name = domain.split('.')[0]
-                list_item = f"Email: {email} | Username: {username} | Company: {domain_name}"
-                self.emails_list.addItem(list_item)
-
+        self.show_results(index)
         self.highlight_results()
 
+    def toggle_live_mode(self, checked):
+        document = self.text_input.document()
+        if checked:
+            text = document.toPlainText()
+            self.live_extractor.reset(text)
+            self.live_offsets.reset(text)
+            document.contentsChange.connect(self.on_contents_change)
+            self.show_results(self.live_extractor.index)
+        else:
+            document.contentsChange.disconnect(self.on_contents_change)
+            self.live_timer.stop()
+
+    def inserted_text(self, position, added):
+        # the text Qt reports as inserted, read from the blocks it spans rather than the whole document
+        document = self.text_input.document()
+        end = min(position + added, document.characterCount() - 1)
+        pieces = []
+        block = document.findBlock(position)
+        while block.isValid() and block.position() < end:
+            # every block but the last ends in a separator, one unit in Qt positions and '\n' in the text
+            text = block.text() + ('\n' if block.next().isValid() else '')
+            lo = max(position - block.position(), 0)
+            hi = min(end - block.position(), utf16_length(text))
+            pieces.append(text[utf16_to_index(text, lo):utf16_to_index(text, hi)])
+            block = block.next()
+        return ''.join(pieces)
+
+    def on_contents_change(self, position, removed, added):
+        # Qt reports UTF-16 offsets; the extractor needs str indices
+        document = self.text_input.document()
+        start, removed, added = self.live_offsets.note_change(
+            position, self.inserted_text(position, added), document.characterCount() - 1)
+        self.live_extractor.note_change(start, removed, added)
+        self.live_timer.start()
+
+    def refresh_live_results(self):
+        added, removed = self.live_extractor.flush(self.text_input.document().toPlainText())
+        if self.address_index is not self.live_extractor.index:
+            # the list shows a manual extraction; go back to the live results
+            self.show_results(self.live_extractor.index)
+            return
+        for email in removed:
+            self.emails_list.takeItem(self.emails_list.row(self.list_items.pop(email)))
+        self.add_result_items(added)
+        if added or removed:
+            self.update_results_title()
+
+    def show_results(self, index):
+        self.address_index = index
+        self.emails_list.clear()
+        self.list_items = {}
+        self.add_result_items(index)
+        self.update_results_title()
+
+    def add_result_items(self, records):
+        records = list(records)
+        saved = self.saved_contacts.contains_many(record.email for record in records)
+
+        for record in records:
+            list_item = f"Email: {record.email} | Username: {record.username} | Company: {record.company}"
+            if record.email in saved:
+                list_item += " [Saved]"
+            item = QListWidgetItem(list_item)
+            item.setData(Qt.ItemDataRole.UserRole, record)
+            self.emails_list.addItem(item)
+            self.list_items[record.email] = item
+
+    def update_results_title(self):
+        index = self.address_index
+        self.results_title.setText(
+            f"Extracted Email Addresses ({len(index)} unique, {len(index.domains)} domains)")
+
+    def selected_records(self):
+        return [item.data(Qt.ItemDataRole.UserRole) for item in self.emails_list.selectedItems()]
+
     def load_contacts(self):
-        if os.path.exists(self.contacts_file):
-            try:
-                with open(self.contacts_file, 'r') as f:
-                    self.saved_contacts = set(json.load(f))
-            except Exception as e:
-                print(f"Error loading contacts: {e}")
-                self.saved_contacts = set()
+        # one-time import of the legacy contacts.json into the indexed store
+        try:
+            self.saved_contacts.migrate_json(self.contacts_file)
+        except Exception as e:
+            print(f"Error loading contacts: {e}")
 
     def save_to_contacts(self):
-        selected_items = self.emails_list.selectedItems()
-        if not selected_items:
+        records = self.selected_records()
+        if not records:
             self.show_error("Please select emails to save.")
             return
 
-        for item in selected_items:
-            text = item.text()
-            email_match = re.search(r'Email: ([^\s|]+)', text)
-            if email_match:
-                email = email_match.group(1)
-                self.saved_contacts.add(email)
-
         try:
-            with open(self.contacts_file, 'w') as f:
-                json.dump(list(self.saved_contacts), f)
+            self.saved_contacts.add_many(record.email for record in records)
+            self.show_results(self.address_index)
             QMessageBox.information(self, "Success", "Contacts saved successfully!")
         except Exception as e:
             self.show_error(f"Error saving contacts: {e}")
 
     def send_email(self):
-        selected_items = self.emails_list.selectedItems()
-        if not selected_items:
+        records = self.selected_records()
+        if not records:
             self.show_error("Please select an email recipient.")
             return
 
-        text = selected_items[0].text()
-        email_match = re.search(r'Email: ([^\s|]+)', text)
-        if not email_match:
-            self.show_error("Invalid email selection.")
-            return
+        recipients = [record.email for record in records]
 
-        recipient = email_match.group(1)
-        dialog = EmailSenderDialog(recipient, self)
+        dialog = EmailSenderDialog(recipients, self)
 
         if dialog.exec():
             try:
-                msg = EmailMessage()
-                msg['Subject'] = dialog.subject_input.text()
-                msg['From'] = dialog.email.text()
-                msg['To'] = recipient
-                msg.set_content(dialog.message_input.toPlainText())
-
-                server = smtplib.SMTP(dialog.smtp_server.text(), int(dialog.smtp_port.text()))
-                server.starttls()
-                server.login(dialog.email.text(), dialog.password.text())
-                server.send_message(msg)
-                server.quit()
-
-                QMessageBox.information(self, "Success", "Email sent successfully!")
+                messages = build_messages(dialog.email.text(), recipients, dialog.subject_input.text(),
+                                          dialog.message_input.toPlainText())
+                pool = SMTPConnectionPool(dialog.smtp_server.text(), int(dialog.smtp_port.text()),
+                                          dialog.email.text(), dialog.password.text(),
+                                          size=dialog.connections.value())
+                sender = BulkSender(pool, workers=dialog.connections.value(), rate=dialog.rate_limit.value())
             except Exception as e:
                 self.show_error(f"Error sending email: {e}")
+                return
+
+            self.send_email_btn.setEnabled(False)
+            self.send_worker = BulkSendWorker(sender, messages, self)
+            self.send_worker.progress.connect(self.on_send_progress)
+            self.send_worker.finished_sending.connect(self.on_send_finished)
+            self.send_worker.failed.connect(lambda error: self.show_error(f"Error sending email: {error}"))
+            self.send_worker.finished.connect(self.on_send_done)
+            self.send_worker.start()
+
+    def on_send_progress(self, done, total):
+        self.send_email_btn.setText(f"Sending {done}/{total}...")
+
+    def on_send_done(self):
+        self.send_email_btn.setEnabled(True)
+        self.send_email_btn.setText("Send Email")
+
+    def on_send_finished(self, results):
+        failed = [r for r in results if not r.ok]
+        if not failed:
+            QMessageBox.information(self, "Success", f"{len(results)} email(s) sent successfully!")
+            return
+
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Warning)
+        box.setWindowTitle("Send Report")
+        box.setText(f"{len(results) - len(failed)} of {len(results)} email(s) sent, {len(failed)} failed.")
+        box.setDetailedText("\n".join(
+            f"{r.recipient}: {'sent' if r.ok else 'failed'} after {r.attempts} attempt(s)"
+            + (f" - {r.error}" if r.error else "") for r in results))
+        box.exec()
 
     def export_contacts(self):
         if not self.saved_contacts:
             self.show_error("No contacts to export.")
             return
 
-        file_path, _ = QFileDialog.getSaveFileName(self, "Export Contacts", "", "CSV Files (*.csv);;Text Files (*.txt)")
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Contacts", "", "CSV Files (*.csv);;Compressed CSV Files (*.csv.gz)")
 
         if file_path:
-            try:
-                with open(file_path, 'w') as f:
-                    for email in self.saved_contacts:
-                        f.write(f"{email}\n")
-                QMessageBox.information(self, "Success", f"Contacts exported to {file_path}")
-            except Exception as e:
-                self.show_error(f"Error exporting contacts: {e}")
+            if selected_filter.startswith("Compressed") and not file_path.endswith('.gz'):
+                file_path += '.gz'
+
+            self.export_btn.setEnabled(False)
+            self.export_worker = ExportWorker(self.contacts_db, file_path, self)
+            self.export_worker.progress.connect(
+                lambda done, total: self.export_btn.setText(f"Exporting {done * 100 // max(total, 1)}%..."))
+            self.export_worker.finished_export.connect(
+                lambda written: QMessageBox.information(
+                    self, "Success", f"{written} contacts exported to {file_path}"))
+            self.export_worker.failed.connect(lambda error: self.show_error(f"Error exporting contacts: {error}"))
+            self.export_worker.finished.connect(self.on_export_done)
+            self.export_worker.start()
+
+    def on_export_done(self):
+        self.export_btn.setEnabled(True)
+        self.export_btn.setText("Export Contacts")
 
     def show_error(self, message):
         QMessageBox.warning(self, "Input Error", message)
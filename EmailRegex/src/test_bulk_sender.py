@@ -0,0 +1,21 @@
+import smtplib
+import socket
+import pytest
+from bulk_sender import is_transient
+
+
+@pytest.mark.parametrize("error,transient", [
+    (smtplib.SMTPResponseException(451, b"try later"), True),
+    (smtplib.SMTPResponseException(550, b"no such user"), False),
+    (smtplib.SMTPDataError(554, b"rejected"), False),
+    (smtplib.SMTPRecipientsRefused({"a@b.com": (450, b"busy"), "c@d.com": (452, b"full")}), True),
+    (smtplib.SMTPRecipientsRefused({"a@b.com": (450, b"busy"), "c@d.com": (550, b"unknown")}), False),
+    (smtplib.SMTPServerDisconnected("gone"), True),
+    (smtplib.SMTPNotSupportedError("SMTPUTF8 not supported"), False),
+    (smtplib.SMTPException("No suitable authentication method found."), False),
+    (ConnectionResetError(), True),
+    (socket.timeout(), True),
+    (ValueError("bad message"), False),
+])
+def test_only_temporary_failures_are_retried(error, transient):
+    assert is_transient(error) is transient
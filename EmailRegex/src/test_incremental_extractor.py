@@ -0,0 +1,74 @@
+import random
+import pytest
+from address_index import EMAIL_PATTERN
+from incremental_extractor import IncrementalExtractor, Utf16Offsets, utf16_length, utf16_to_index
+
+
+PIECES = list("ab.@ -\nx.comc") + ["a@b.com", " ", "foo@bar.org", ".", "\U0001F600", "é"]
+
+
+def random_text(rng, size):
+    return ''.join(rng.choice(PIECES) for _ in range(size))
+
+
+def assert_matches_full_scan(extractor, text):
+    matches = list(EMAIL_PATTERN.finditer(text))
+    assert extractor.emails == [m.group() for m in matches]
+    assert extractor.starts == [m.start() for m in matches]
+    assert set(extractor.index.records) == {m.group().lower() for m in matches}
+
+
+@pytest.mark.parametrize("margin", [0, 1, 3, 64])
+def test_edits_match_a_full_rescan(margin):
+    rng = random.Random(margin)
+    for _ in range(500):
+        text = random_text(rng, rng.randint(0, 60))
+        extractor = IncrementalExtractor(margin)
+        extractor.reset(text)
+        for _ in range(rng.randint(1, 4)):
+            # several edits may pile up before one flush
+            shown = set(extractor.index.records)
+            for _ in range(rng.randint(1, 3)):
+                position = rng.randint(0, len(text))
+                removed = rng.randint(0, min(5, len(text) - position))
+                inserted = random_text(rng, rng.randint(0, 4))
+                text = text[:position] + inserted + text[position + removed:]
+                extractor.note_change(position, removed, len(inserted))
+            added, gone = extractor.flush(text)
+            assert_matches_full_scan(extractor, text)
+            # the changes reported turn the previous set of emails into the current one
+            assert not shown & {record.email for record in added} and set(gone) <= shown
+            assert (shown - set(gone)) | {record.email for record in added} == set(extractor.index.records)
+
+
+def test_flush_without_changes():
+    extractor = IncrementalExtractor()
+    extractor.reset("a@b.com")
+    assert extractor.flush("a@b.com") == ([], [])
+
+
+@pytest.mark.parametrize("text", ["plain a@b.com", "\U0001F600 a@b.com \U0001F600x@y.org", "é\U0001F600é"])
+def test_utf16_offsets_become_str_indices(text):
+    for index in range(len(text) + 1):
+        offset = len(text[:index].encode('utf-16-le')) // 2
+        assert utf16_to_index(text, offset) == index
+    assert utf16_to_index(text, 10 ** 6) == len(text)
+
+
+def test_utf16_offsets_follow_qt_edits():
+    rng = random.Random(7)
+    for _ in range(300):
+        text = random_text(rng, rng.randint(0, 30))
+        offsets = Utf16Offsets()
+        offsets.reset(text)
+        for _ in range(5):
+            # an edit as the GUI sees it: UTF-16 position, the inserted text and the new UTF-16 length
+            index = rng.randint(0, len(text))
+            removed = rng.randint(0, min(4, len(text) - index))
+            inserted = random_text(rng, rng.randint(0, 3))
+            position = utf16_length(text[:index])
+            new_text = text[:index] + inserted + text[index + removed:]
+            assert offsets.note_change(position, inserted, utf16_length(new_text)) == (index, removed, len(inserted))
+            text = new_text
+            for i in range(len(text) + 1):
+                assert offsets.to_index(utf16_length(text[:i])) == i
@@ -0,0 +1,115 @@
+import argparse
+import csv
+import fnmatch
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from name_index import get_name_index
+from anon_stream import anonymize_file, add_pseudonym_arguments
+from pseudonym_vault import PseudonymVault, load_or_create_key
+
+
+_worker_name_index = None
+_worker_vault = None
+
+
+def init_worker(name_lists, vault_path=None, key=None):
+    global _worker_name_index, _worker_vault
+    _worker_name_index = get_name_index(name_lists)
+    if vault_path:
+        _worker_vault = PseudonymVault(vault_path, key)
+        # flushes the worker's last batch of new pseudonyms when the pool shuts down
+        Finalize(_worker_vault, _worker_vault.close, exitpriority=10)
+
+
+def anonymize_job(job):
+    input_path, output_path = job
+    # write to a side file and rename, so an interrupted run never leaves a partial output behind
+    tmp_path = output_path + ".part"
+    try:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        anonymize_file(input_path, tmp_path, _worker_name_index, vault=_worker_vault)
+        os.replace(tmp_path, output_path)
+        return input_path, output_path, None
+    except Exception as e:
+        return input_path, output_path, str(e)
+
+
+def collect_jobs(input_dir, output_dir, pattern="*.txt"):
+    jobs = []
+    for root, _, files in os.walk(input_dir):
+        for name in sorted(files):
+            if fnmatch.fnmatch(name, pattern):
+                input_path = os.path.join(root, name)
+                relative = os.path.relpath(input_path, input_dir)
+                jobs.append((input_path, os.path.join(output_dir, relative)))
+    return jobs
+
+
+def print_progress(done, total, failed, started):
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed else 0
+    sys.stderr.write(f"\r{done}/{total} files, {failed} failed, {rate:.1f} files/s")
+    sys.stderr.flush()
+
+
+def run_batch(input_dir, output_dir, workers=None, name_lists=(), pattern="*.txt", progress=print_progress,
+              vault_path=None, key=None):
+    jobs = collect_jobs(input_dir, output_dir, pattern)
+    pending = [job for job in jobs if not os.path.exists(job[1])]
+    skipped = len(jobs) - len(pending)
+
+    # loading the index in the parent lets forked workers inherit it instead of reading it again
+    name_lists = tuple(name_lists)
+    get_name_index(name_lists)
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, "manifest.csv")
+    new_manifest = not os.path.exists(manifest_path)
+    done = failed = 0
+    started = time.perf_counter()
+    with open(manifest_path, 'a', newline='', encoding='utf-8') as manifest, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                initargs=(name_lists, vault_path, key)) as pool:
+        writer = csv.writer(manifest)
+        if new_manifest:
+            writer.writerow(["input", "output", "status"])
+        chunksize = max(1, min(64, len(pending) // ((workers or os.cpu_count() or 1) * 8)))
+        report_every = max(1, len(pending) // 200)
+        for input_path, output_path, error in pool.map(anonymize_job, pending, chunksize=chunksize):
+            done += 1
+            if error:
+                failed += 1
+            writer.writerow([input_path, output_path, f"error: {error}" if error else "ok"])
+            if progress and (done % report_every == 0 or done == len(pending)):
+                progress(done, len(pending), failed, started)
+    if progress:
+        sys.stderr.write("\n")
+    return done - failed, failed, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anonymize every matching file under a directory in parallel")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--pattern", default="*.txt", help="file name pattern to include")
+    parser.add_argument("--names", action="append", default=[], help="extra name list, one name per line")
+    add_pseudonym_arguments(parser)
+    args = parser.parse_args()
+
+    vault_path = key = None
+    if args.pseudonymize:
+        vault_path = args.vault
+        key = load_or_create_key(args.key_file)
+    written, failed, skipped = run_batch(args.input_dir, args.output_dir, args.workers, args.names, args.pattern,
+                                         vault_path=vault_path, key=key)
+    print(f"{written} anonymized, {failed} failed, {skipped} already done")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import io
+import re
+import sqlite3
+import sys
+from name_index import get_name_index
+from name_matcher import iter_name_spans, write_spans
+from pseudonym_vault import PseudonymVault, DEFAULT_VAULT, DEFAULT_KEY_FILE, load_or_create_key, pseudonymize_spans
+
+
+CHUNK_SIZE = 1 << 20
+# a piece without whitespace longer than this is cut mid-token rather than buffered further
+MAX_TOKEN_CARRY = 16 << 20
+BREAK_CHARS = ' \n\t\r\f\v'
+WHITESPACE = re.compile(r'\s')
+SENTENCE_END = '.!?'
+
+
+def ends_sentence(text, default):
+    i = len(text) - 1
+    while i >= 0 and text[i].isspace():
+        i -= 1
+    return text[i] in SENTENCE_END if i >= 0 else default
+
+
+def anonymize_to(text, out, name_index=None, vault=None):
+    # a whole text already in memory; no GUI needed, so benchmarks and tools use it directly
+    spans = iter_name_spans(text, name_index if name_index is not None else get_name_index())
+    if vault is not None:
+        spans = pseudonymize_spans(text, spans, vault)
+    write_spans(text, spans, out)
+
+
+def anonymize_text(text, name_index=None, vault=None):
+    out = io.StringIO()
+    anonymize_to(text, out, name_index, vault)
+    return out.getvalue()
+
+
+def anonymize_stream(src, dst, name_index=None, replacement="xxx", chunk_size=CHUNK_SIZE, vault=None, progress=None):
+    # Pieces are cut after their last whitespace so no token straddles two pieces, and whether the
+    # next piece opens a sentence is carried over, which keeps the first-word rule exact.
+    names = name_index if name_index is not None else get_name_index()
+    sentence_start = True
+    mid_token = False
+    carry = ''
+    consumed = 0
+    while True:
+        chunk = src.read(chunk_size)
+        consumed += len(chunk)
+        buffer = carry + chunk if carry else chunk
+        carry = ''
+        if not buffer:
+            break
+
+        if mid_token:
+            # the previous piece was force-cut inside a token; pass the rest of that token through
+            boundary = WHITESPACE.search(buffer)
+            if boundary is None:
+                dst.write(buffer)
+                continue
+            dst.write(buffer[:boundary.start()])
+            sentence_start = buffer[boundary.start() - 1] in SENTENCE_END if boundary.start() else sentence_start
+            buffer = buffer[boundary.start():]
+            mid_token = False
+
+        if chunk:
+            cut = max(buffer.rfind(c) for c in BREAK_CHARS) + 1
+            if cut == 0:
+                if len(buffer) < MAX_TOKEN_CARRY:
+                    carry = buffer
+                    continue
+                cut = len(buffer)
+                mid_token = True
+            carry = buffer[cut:]
+            buffer = buffer[:cut]
+
+        spans = iter_name_spans(buffer, names, replacement, sentence_start)
+        if vault is not None:
+            spans = pseudonymize_spans(buffer, spans, vault)
+        write_spans(buffer, spans, dst)
+        sentence_start = ends_sentence(buffer, sentence_start)
+        if progress:
+            progress(consumed)
+        if not chunk:
+            break
+
+
+def anonymize_file(input_path, output_path, name_index=None, replacement="xxx", chunk_size=CHUNK_SIZE,
+                   encoding='utf-8', vault=None, progress=None):
+    with open(input_path, 'r', encoding=encoding, newline='') as src, \
+            open(output_path, 'w', encoding=encoding, newline='', buffering=CHUNK_SIZE) as dst:
+        anonymize_stream(src, dst, name_index, replacement, chunk_size, vault, progress)
+
+
+def add_pseudonym_arguments(parser):
+    parser.add_argument("--pseudonymize", action="store_true", help="replace names with stable tokens")
+    parser.add_argument("--vault", default=DEFAULT_VAULT, help="SQLite pseudonym vault")
+    parser.add_argument("--key-file", default=DEFAULT_KEY_FILE, help="secret key for pseudonym tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anonymize names in a text file of any size with constant memory")
+    parser.add_argument("input", help="input text file, or - for stdin")
+    parser.add_argument("output", help="output text file, or - for stdout")
+    parser.add_argument("--names", action="append", default=[], help="extra name list, one name per line")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="characters read per chunk")
+    parser.add_argument("--encoding", default='utf-8')
+    add_pseudonym_arguments(parser)
+    args = parser.parse_args()
+
+    if args.chunk_size < 1:
+        parser.error("chunk size must be positive")
+    vault = None
+    try:
+        name_index = get_name_index(args.names)
+        if args.pseudonymize:
+            vault = PseudonymVault(args.vault, load_or_create_key(args.key_file))
+        if args.input == '-' or args.output == '-':
+            src = sys.stdin if args.input == '-' else open(args.input, 'r', encoding=args.encoding, newline='')
+            dst = sys.stdout if args.output == '-' else open(args.output, 'w', encoding=args.encoding, newline='')
+            with src, dst:
+                anonymize_stream(src, dst, name_index, chunk_size=args.chunk_size, vault=vault)
+        else:
+            anonymize_file(args.input, args.output, name_index, chunk_size=args.chunk_size, encoding=args.encoding,
+                           vault=vault)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        # UnicodeDecodeError is a ValueError, as is a file that is not a name dictionary
+        print(f"Error anonymizing {args.input}: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if vault is not None:
+            vault.close()
+
+
+if __name__ == "__main__":
+    main()
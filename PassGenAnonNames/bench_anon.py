@@ -0,0 +1,142 @@
+import argparse
+import cProfile
+import io
+import pstats
+import random
+import string
+import time
+import tracemalloc
+from name_index import get_name_index, load_base_names
+from name_matcher import iter_name_spans, write_spans
+from anon_stream import anonymize_stream, anonymize_text
+
+
+SIZES = [0.1, 1.0, 10.0]
+DENSITIES = [0.01, 0.1, 0.3]
+COMMON_WORDS = ["the", "of", "and", "to", "in", "was", "said", "that", "for", "with", "had", "her", "his",
+                "on", "at", "by", "not", "from", "they", "which", "have", "one", "you", "were", "would"]
+CAPITALIZED_WORDS = ["The", "London", "Monday", "Street", "Company", "English", "River", "Doctor"]
+SENTENCE_ENDS = [". ", ". ", ". ", "! ", "? ", ".\n\n"]
+
+
+def random_word(rng):
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+
+
+def generate_synthetic(rng, size, density, names):
+    # uniform tokens: a name with probability `density`, otherwise a random lowercase word
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(names) if rng.random() < density else random_word(rng)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def generate_prose(rng, size, density, names):
+    # sentence-shaped text: capitalized openers, non-name capitals, punctuation and line breaks
+    parts = []
+    length = 0
+    while length < size:
+        sentence = []
+        for _ in range(rng.randint(4, 20)):
+            roll = rng.random()
+            if roll < density:
+                word = rng.choice(names) + rng.choice(["", "", "", ",", "'s"])
+            elif roll < density + 0.05:
+                word = rng.choice(CAPITALIZED_WORDS)
+            else:
+                word = rng.choice(COMMON_WORDS)
+            sentence.append(word)
+        sentence[0] = sentence[0][:1].upper() + sentence[0][1:]
+        text = ' '.join(sentence) + rng.choice(SENTENCE_ENDS)
+        parts.append(text)
+        length += len(text)
+    return ''.join(parts)
+
+
+def build_corpora(sizes, densities, names, seed, corpus_files=()):
+    rng = random.Random(seed)
+    corpora = {}
+    for size in sizes:
+        for density in densities:
+            corpora[f"synthetic {size:g}MB {density:.0%}"] = generate_synthetic(rng, int(size * 1e6), density, names)
+            corpora[f"prose {size:g}MB {density:.0%}"] = generate_prose(rng, int(size * 1e6), density, names)
+    for path in corpus_files:
+        with open(path, 'r', encoding='utf-8') as f:
+            corpora[path] = f.read()
+    return corpora
+
+
+def best_time(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def time_index_load(repeat):
+    # the name corpus is read from the pickle cache after the first run; this is the per-process cost
+    load_base_names()
+    elapsed, names = best_time(load_base_names, repeat)
+    print(f"name index load: {elapsed * 1000:.1f} ms for {len(names)} names")
+
+
+def run_stages(corpora, name_index, repeat):
+    print(f"\n{'corpus':<26}{'MB':>7}{'tokens':>11}{'names':>9}"
+          f"{'detect ms':>11}{'write ms':>10}{'total ms':>10}{'stream ms':>11}{'Mtok/s':>8}{'peak MB':>9}")
+    for corpus_name, text in corpora.items():
+        tokens = len(text.split())
+        detect, spans = best_time(lambda: list(iter_name_spans(text, name_index)), repeat)
+        write, _ = best_time(lambda: write_spans(text, spans, io.StringIO()), repeat)
+        total, _ = best_time(lambda: anonymize_text(text, name_index), repeat)
+        stream, _ = best_time(lambda: anonymize_stream(io.StringIO(text), io.StringIO(), name_index), repeat)
+        print(f"{corpus_name:<26}{len(text) / 1e6:>7.2f}{tokens:>11}{len(spans):>9}"
+              f"{detect * 1000:>11.1f}{write * 1000:>10.1f}{total * 1000:>10.1f}{stream * 1000:>11.1f}"
+              f"{tokens / total / 1e6:>8.2f}{peak_memory(text, name_index) / 1e6:>9.1f}")
+
+
+def peak_memory(text, name_index):
+    # traced separately since tracemalloc slows every allocation down
+    tracemalloc.start()
+    try:
+        anonymize_text(text, name_index)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_profile(text, name_index, path):
+    profiler = cProfile.Profile()
+    profiler.runcall(anonymize_text, text, name_index)
+    profiler.dump_stats(path)
+    print(f"\nprofile written to {path}")
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and profile the name anonymizer")
+    parser.add_argument("--sizes", type=float, nargs="+", default=SIZES, help="corpus sizes in MB")
+    parser.add_argument("--densities", type=float, nargs="+", default=DENSITIES, help="fraction of tokens that are names")
+    parser.add_argument("--corpus", action="append", default=[], help="extra text file to benchmark")
+    parser.add_argument("--names", action="append", default=[], help="extra name list, one name per line")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--profile", metavar="FILE", help="write cProfile stats for the largest corpus to FILE")
+    args = parser.parse_args()
+
+    time_index_load(args.repeat)
+    name_index = get_name_index(args.names)
+    names = sorted(load_base_names())
+    corpora = build_corpora(args.sizes, args.densities, names, args.seed, args.corpus)
+    run_stages(corpora, name_index, args.repeat)
+    if args.profile:
+        run_profile(max(corpora.values(), key=len), name_index, args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import numpy as np
+from file_batches import iter_line_batches, iter_merged_runs
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BREACH_INDEX = os.path.join(BASE_DIR, "breached.idx")
+MAGIC = b'BREACH01'
+# magic, hash count, bloom bits, bloom hash count, hashes offset, bloom offset
+HEADER = struct.Struct('<8sQQQQQ')
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+READ_SIZE = 64 << 20
+RUN_SIZE = 50_000_000
+BLOOM_BATCH = 1 << 20
+# SHA-1 hash lists put the 40 hex digits first, optionally followed by ":count"
+HASH_LINE = re.compile(rb'[0-9A-Fa-f]{40}(?::\d+)?')
+BIT_VALUES = np.array([1 << i for i in range(8)], dtype=np.uint8)
+# breached candidates drawn in a row before a generator stops looking for one that is not
+MAX_BREACHED_DRAWS = 100_000
+SPACE_BREACHED = (f"gave up after {MAX_BREACHED_DRAWS} breached passwords in a row: "
+                  f"(nearly) every password these settings allow is breached")
+
+
+def sha1_prefixes(passwords):
+    # first 8 bytes of each SHA-1 as an integer, so numeric order matches the hex order of hash lists
+    sha1 = hashlib.sha1
+    digests = b''.join([sha1(p.encode('utf-8') if isinstance(p, str) else p).digest()[:8] for p in passwords])
+    return np.frombuffer(digests, dtype='>u8').astype(np.uint64)
+
+
+def bloom_positions(hashes, n_bits, n_hashes):
+    # the prefixes are already uniform, so their two halves serve as the double-hashing pair
+    low = hashes & np.uint64(0xFFFFFFFF)
+    step = (hashes >> np.uint64(32)) | np.uint64(1)
+    rounds = np.arange(n_hashes, dtype=np.uint64)
+    return (low[:, None] + rounds[None, :] * step[:, None]) % np.uint64(n_bits)
+
+
+def bloom_size(count, false_positive_rate):
+    count = max(count, 1)
+    n_bits = math.ceil(-count * math.log(false_positive_rate) / math.log(2) ** 2)
+    n_bits = (n_bits + 63) // 64 * 64
+    return n_bits, max(1, round(n_bits / count * math.log(2)))
+
+
+class BreachIndex:
+    # A Bloom filter answers most lookups without touching the hash list; only its positives are
+    # confirmed by binary search over the sorted prefixes. Both live in one read-only memory
+    # mapping, so opening is instant and the pages are shared by every process using the index.
+    def __init__(self, path=DEFAULT_BREACH_INDEX):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < HEADER.size or self.mm[:len(MAGIC)] != MAGIC:
+            self.mm.close()
+            raise ValueError(f"{path} is not a breach index")
+        _, self.count, self.n_bits, self.n_hashes, hashes_offset, bloom_offset = HEADER.unpack_from(self.mm, 0)
+        self.hashes = np.frombuffer(self.mm, dtype='<u8', count=self.count, offset=hashes_offset)
+        self.bloom = np.frombuffer(self.mm, dtype=np.uint8, count=self.n_bits // 8, offset=bloom_offset)
+
+    def __len__(self):
+        return self.count
+
+    def contains_hashes(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        if not self.count or not len(hashes):
+            return found
+        positions = bloom_positions(hashes, self.n_bits, self.n_hashes)
+        maybe = ((self.bloom[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1).all(axis=1)
+        # searching in sorted order walks the mapped file forwards instead of jumping around it
+        candidates = np.sort(hashes[maybe])
+        index = np.minimum(np.searchsorted(self.hashes, candidates), self.count - 1)
+        hits = np.unique(candidates[self.hashes[index] == candidates])
+        found[maybe] = np.isin(hashes[maybe], hits, assume_unique=False)
+        return found
+
+    def contains_many(self, passwords):
+        return self.contains_hashes(sha1_prefixes(passwords))
+
+    def __contains__(self, password):
+        return bool(self.contains_many([password])[0])
+
+    def draw(self, generate):
+        # Draws again until a password is not breached, which keeps the choice uniform over the
+        # rest. Redraws are checked in growing batches, and a space that is entirely breached fails
+        # instead of looping forever.
+        batch = 1
+        drawn = 0
+        while drawn < MAX_BREACHED_DRAWS:
+            candidates = [generate() for _ in range(batch)]
+            breached = self.contains_many(candidates)
+            if not breached.all():
+                return candidates[int(np.argmin(breached))]
+            drawn += batch
+            batch = min(2 * batch, 1 << 12)
+        raise ValueError(SPACE_BREACHED)
+
+    def close(self):
+        # the arrays must be released before the mapping can close
+        self.hashes = self.bloom = None
+        self.mm.close()
+
+
+def open_default_index():
+    # screening is optional: without a local hash list nothing is rejected
+    if os.path.exists(DEFAULT_BREACH_INDEX):
+        return BreachIndex(DEFAULT_BREACH_INDEX)
+    return None
+
+
+def parse_hash_lines(lines, plaintext):
+    lines = [line.strip() for line in lines]
+    lines = [line for line in lines if line]
+    if plaintext:
+        return sha1_prefixes(lines)
+    for line in lines:
+        if HASH_LINE.fullmatch(line) is None:
+            raise ValueError(f"not a SHA-1 hash line: {line[:60].decode('ascii', 'replace')!r}")
+    hex_prefixes = b''.join(line[:16] for line in lines).decode('ascii')
+    return np.frombuffer(bytes.fromhex(hex_prefixes), dtype='>u8').astype(np.uint64)
+
+
+def iter_hash_chunks(paths, plaintext, read_size=READ_SIZE):
+    for path in paths:
+        with open(path, 'rb') as f:
+            carry = b''
+            while True:
+                data = f.read(read_size)
+                if not data:
+                    break
+                lines = (carry + data).split(b'\n')
+                carry = lines.pop()
+                yield parse_hash_lines(lines, plaintext)
+            if carry:
+                yield parse_hash_lines([carry], plaintext)
+
+
+def write_runs(paths, run_dir, plaintext, run_size):
+    # sorted, de-duplicated runs of at most run_size prefixes each
+    run_paths = []
+    pending = []
+    pending_size = 0
+
+    def flush():
+        run = np.unique(np.concatenate(pending))
+        run_path = os.path.join(run_dir, f"run{len(run_paths):05d}.u64")
+        run.astype('<u8').tofile(run_path)
+        run_paths.append(run_path)
+
+    for chunk in iter_hash_chunks(paths, plaintext):
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= run_size:
+            flush()
+            pending, pending_size = [], 0
+    if pending_size:
+        flush()
+    return run_paths
+
+
+def merge_runs(run_paths, out, bloom, n_bits, n_hashes):
+    # writes the merged prefixes and sets their bits in the filter as they stream past
+    written = 0
+    for merged, _ in iter_merged_runs(run_paths, '<u8'):
+        merged.tofile(out)
+        for start in range(0, len(merged), BLOOM_BATCH):
+            bits = bloom_positions(merged[start:start + BLOOM_BATCH].astype(np.uint64), n_bits, n_hashes)
+            np.bitwise_or.at(bloom, bits >> np.uint64(3), BIT_VALUES[bits & np.uint64(7)])
+        written += len(merged)
+    return written
+
+
+def build_breach_index(output_path, input_paths, plaintext=False, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE,
+                       run_size=RUN_SIZE):
+    run_dir = tempfile.mkdtemp(prefix="breach_runs_", dir=os.path.dirname(os.path.abspath(output_path)))
+    tmp_path = output_path + ".tmp"
+    try:
+        run_paths = write_runs(input_paths, run_dir, plaintext, run_size)
+        # runs may share prefixes, so their total only bounds the final count; the filter is sized for it
+        upper_bound = sum(os.path.getsize(path) // 8 for path in run_paths)
+        n_bits, n_hashes = bloom_size(upper_bound, false_positive_rate)
+        bloom = np.zeros(n_bits // 8, dtype=np.uint8)
+        with open(tmp_path, 'wb') as out:
+            out.write(bytes(HEADER.size))
+            count = merge_runs(run_paths, out, bloom, n_bits, n_hashes)
+            bloom_offset = HEADER.size + count * 8
+            bloom.tofile(out)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, count, n_bits, n_hashes, HEADER.size, bloom_offset))
+        os.replace(tmp_path, output_path)
+        return count
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query an offline index of breached password hashes")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="build an index from SHA-1 hash lists (HASH[:count] per line)")
+    build_parser.add_argument("output")
+    build_parser.add_argument("inputs", nargs="+")
+    build_parser.add_argument("--plaintext", action="store_true", help="inputs list passwords rather than hashes")
+    build_parser.add_argument("--fpr", type=float, default=DEFAULT_FALSE_POSITIVE_RATE,
+                              help="Bloom filter false positive rate")
+    build_parser.add_argument("--run-size", type=int, default=RUN_SIZE, help="hashes sorted in memory per run")
+    check_parser = subparsers.add_parser("check", help="count breached passwords in a file (one per line)")
+    check_parser.add_argument("index")
+    check_parser.add_argument("passwords")
+    args = parser.parse_args()
+
+    if args.command == "build" and (not 0 < args.fpr < 1 or args.run_size < 1):
+        parser.error("false positive rate must be between 0 and 1 and run size positive")
+    started = time.perf_counter()
+    try:
+        if args.command == "build":
+            count = build_breach_index(args.output, args.inputs, args.plaintext, args.fpr, args.run_size)
+            print(f"Indexed {count} hashes in {time.perf_counter() - started:.1f}s")
+        else:
+            index = BreachIndex(args.index)
+            checked = breached = 0
+            for batch in iter_line_batches(args.passwords):
+                checked += len(batch)
+                breached += int(index.contains_many(batch).sum())
+            elapsed = time.perf_counter() - started
+            print(f"{breached} of {checked} passwords are breached "
+                  f"({checked / elapsed if elapsed else 0:,.0f} checked/s)")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
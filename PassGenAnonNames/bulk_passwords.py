@@ -0,0 +1,325 @@
+import argparse
+import io
+import os
+import shutil
+import string
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from password_policy import PasswordPolicy, CHARACTER_CLASSES, AMBIGUOUS_CHARACTERS
+from breach_screen import MAX_BREACHED_DRAWS, SPACE_BREACHED, BreachIndex
+from file_batches import iter_merged_runs
+
+
+DEFAULT_ALPHABET = string.ascii_letters + string.digits + string.punctuation
+BLOCK_SIZE = 1 << 16
+# passwords per worker job; a worker holds one job's output in memory when sorting it
+SHARD_SIZE = 4_000_000
+
+
+def random_indices(count, alphabet_size):
+    # Uniform indices in [0, alphabet_size) from OS randomness. Raw values at or above the largest
+    # multiple of alphabet_size are discarded rather than reduced, so the final modulo has no bias.
+    if alphabet_size <= 1 << 8:
+        dtype = np.dtype(np.uint8)
+    elif alphabet_size <= 1 << 16:
+        dtype = np.dtype(np.uint16)
+    else:
+        dtype = np.dtype(np.uint32)
+    span = 1 << (8 * dtype.itemsize)
+    limit = span - span % alphabet_size
+    out = np.empty(count, dtype=dtype)
+    filled = 0
+    while filled < count:
+        needed = count - filled
+        # ask for enough that one draw usually suffices at the expected acceptance rate
+        draw = needed * span // limit + 64
+        raw = np.frombuffer(os.urandom(draw * dtype.itemsize), dtype=dtype)
+        if limit < span:
+            raw = raw[raw < limit]
+        taken = min(len(raw), needed)
+        out[filled:filled + taken] = raw[:taken] % alphabet_size
+        filled += taken
+    return out
+
+
+def alphabet_table(alphabet):
+    if not alphabet:
+        raise ValueError("alphabet is empty")
+    if len(set(alphabet)) != len(alphabet):
+        raise ValueError("alphabet contains duplicate characters")
+    try:
+        return np.frombuffer(alphabet.encode('ascii'), dtype=np.uint8)
+    except UnicodeEncodeError:
+        raise ValueError("alphabet must be ASCII") from None
+
+
+def generate_block(count, length, alphabet=DEFAULT_ALPHABET):
+    # newline-terminated passwords as one bytes object; the newline column is part of the array
+    table = alphabet_table(alphabet)
+    lines = np.empty((count, length + 1), dtype=np.uint8)
+    lines[:, :length] = table[random_indices(count * length, len(table)).reshape(count, length)]
+    lines[:, length] = ord('\n')
+    return lines.tobytes()
+
+
+def drop_breached(block, breach_index, limit):
+    # the first `limit` passwords of the block that are not breached
+    lines = block.split(b'\n')[:-1]
+    breached = breach_index.contains_many(lines)
+    if not breached.any() and len(lines) <= limit:
+        return block, len(lines)
+    kept = [line for line, hit in zip(lines, breached) if not hit][:limit]
+    return b''.join(line + b'\n' for line in kept), len(kept)
+
+
+def write_blocks(out, count, make_block, block_size=BLOCK_SIZE, progress=None, breach_index=None):
+    # out is a binary file; blocks are written as they are generated so memory stays bounded, and
+    # passwords found in the breach index are dropped and made up for by the next block, which
+    # grows while whole blocks come out breached
+    written = 0
+    wasted = 0
+    while written < count:
+        n = min(block_size, max(count - written, wasted))
+        block = make_block(n)
+        if breach_index is not None:
+            block, kept = drop_breached(block, breach_index, count - written)
+            wasted = 0 if kept else wasted + n
+            if wasted >= MAX_BREACHED_DRAWS:
+                raise ValueError(SPACE_BREACHED)
+            n = kept
+        out.write(block)
+        written += n
+        if progress:
+            progress(written, count)
+    return written
+
+
+def policy_classes(alphabet):
+    # the standard classes cut down to the alphabet, plus its characters that are in none of them
+    classes = {name: ''.join(c for c in chars if c in alphabet) for name, chars in CHARACTER_CLASSES.items()}
+    others = ''.join(c for c in alphabet if not any(c in chars for chars in CHARACTER_CLASSES.values()))
+    if others:
+        classes["other"] = others
+    return classes
+
+
+def make_block_function(length, alphabet=DEFAULT_ALPHABET, policy_args=None):
+    if policy_args is None:
+        return lambda n: generate_block(n, length, alphabet)
+    policy = PasswordPolicy(*policy_args)
+    return lambda n: ('\n'.join(policy.generate_many(n)) + '\n').encode('ascii')
+
+
+_worker_make_block = None
+_worker_breach_index = None
+
+
+def init_worker(length, alphabet, policy_args, breach_index_path):
+    # each worker builds its own policy tables and maps the breach index once
+    global _worker_make_block, _worker_breach_index
+    _worker_make_block = make_block_function(length, alphabet, policy_args)
+    _worker_breach_index = BreachIndex(breach_index_path) if breach_index_path else None
+
+
+def generate_segment(job):
+    # Writes one shard to its own file. Entropy is drawn per block inside the worker, so workers
+    # never share a buffer. For unique output the worker also writes the shard's distinct
+    # passwords, sorted, to a run file and reports those it drew more than once, so the parent
+    # finds every repeat with one merge of the runs.
+    segment_path, count, record_size, block_size, unique = job
+    with open(segment_path, 'wb') as out:
+        if not unique:
+            return segment_path, write_blocks(out, count, _worker_make_block, block_size,
+                                              breach_index=_worker_breach_index), None
+        buffer = io.BytesIO()
+        written = write_blocks(buffer, count, _worker_make_block, block_size, breach_index=_worker_breach_index)
+        out.write(buffer.getbuffer())
+    run, copies = np.unique(np.frombuffer(buffer.getbuffer(), dtype=f'S{record_size}'), return_counts=True)
+    run.tofile(segment_path + ".run")
+    return segment_path, written, run[copies > 1]
+
+
+def find_repeats(segment_paths, sorted_path, record_size, shard_repeats):
+    # merges the shards' runs into one sorted file of every distinct password; a password held by
+    # several runs, or drawn twice within a shard, is a repeat
+    repeats = set()
+    for records in shard_repeats:
+        repeats.update(records.tolist())
+    distinct = 0
+    with open(sorted_path, 'wb') as out:
+        for merged, runs_holding in iter_merged_runs([path + ".run" for path in segment_paths], f'S{record_size}'):
+            merged.tofile(out)
+            repeats.update(merged[runs_holding > 1].tolist())
+            distinct += len(merged)
+    return distinct, repeats
+
+
+def write_first_copies(segment_paths, out, record_size, repeats):
+    # copies the segments in the order they were generated, keeping only the first copy of a repeat
+    repeated = np.array(sorted(repeats), dtype=f'S{record_size}')
+    seen = set()
+    for segment_path in segment_paths:
+        records = np.fromfile(segment_path, dtype=f'S{record_size}')
+        if len(repeated):
+            keep = np.ones(len(records), dtype=bool)
+            for i in np.flatnonzero(np.isin(records, repeated)):
+                if records[i] in seen:
+                    keep[i] = False
+                else:
+                    seen.add(records[i])
+            records = records[keep]
+        out.write(records.tobytes())
+
+
+def top_up_unique(sorted_path, out, count, written, record_size, make_block, possible, breach_index=None):
+    # Replaces the repeats that were dropped with fresh passwords not written yet, in the order they
+    # are drawn; sorted_path holds every password written so far. Draws that find nothing new stop
+    # once they far exceed what finding the last free password of the space takes, since by then
+    # every password left is breached.
+    existing = np.memmap(sorted_path, dtype=f'S{record_size}', mode='r') if written else np.empty(0, f'S{record_size}')
+    extra_records = []
+    wasted = 0
+    while written < count:
+        missing = count - written
+        drawn = max(missing + missing // 10, BLOCK_SIZE)
+        buffer = io.BytesIO()
+        write_blocks(buffer, drawn, make_block, breach_index=breach_index)
+        candidates = np.frombuffer(buffer.getbuffer(), dtype=f'S{record_size}')
+        _, first = np.unique(candidates, return_index=True)
+        candidates = candidates[np.sort(first)]
+        if len(existing):
+            index = np.minimum(np.searchsorted(existing, candidates), len(existing) - 1)
+            candidates = candidates[existing[index] != candidates]
+        for earlier in extra_records:
+            candidates = candidates[~np.isin(candidates, earlier)]
+        candidates = candidates[:missing]
+        wasted = 0 if len(candidates) else wasted + drawn
+        if wasted >= MAX_BREACHED_DRAWS + 20 * possible:
+            raise ValueError(f"the password space is exhausted: only {written} distinct passwords "
+                             f"these settings allow are not breached")
+        extra_records.append(candidates)
+        out.write(candidates.tobytes())
+        written += len(candidates)
+    del existing
+    return written
+
+
+def write_parallel(out, count, length, alphabet=DEFAULT_ALPHABET, policy_args=None, workers=None, unique=False,
+                   block_size=BLOCK_SIZE, breach_index_path=None, progress=None):
+    # Shards the count across worker processes that each write their own segment file, then
+    # concatenates the segments. With `unique`, a merge of the shards' sorted runs finds the
+    # repeats; the segments are still written in generation order, minus the later copies of each
+    # repeat, followed by fresh passwords that replace them.
+    record_size = length + 1
+    if unique:
+        possible = PasswordPolicy(*policy_args).count() if policy_args else len(alphabet) ** length
+        if count > possible:
+            raise ValueError(f"only {possible} distinct passwords exist for these settings")
+    workers = workers or os.cpu_count() or 1
+    shard_size = max(1, min(SHARD_SIZE, -(-count // workers)))
+    segment_dir = tempfile.mkdtemp(prefix="passwords_")
+    jobs = [(os.path.join(segment_dir, f"segment{i:05d}.txt"), min(shard_size, count - start), record_size,
+             block_size, unique) for i, start in enumerate(range(0, count, shard_size))]
+    try:
+        segment_paths = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(length, alphabet, policy_args, breach_index_path)) as pool:
+            done = 0
+            shard_repeats = []
+            for segment_path, records, repeats in pool.map(generate_segment, jobs):
+                segment_paths.append(segment_path)
+                shard_repeats.append(repeats)
+                done += records
+                if progress:
+                    progress(done, count)
+        if not unique:
+            for segment_path in segment_paths:
+                with open(segment_path, 'rb') as segment:
+                    shutil.copyfileobj(segment, out, 1 << 20)
+            return done
+
+        sorted_path = os.path.join(segment_dir, "sorted.txt")
+        written, repeats = find_repeats(segment_paths, sorted_path, record_size, shard_repeats)
+        write_first_copies(segment_paths, out, record_size, repeats)
+        if written < count:
+            breach_index = BreachIndex(breach_index_path) if breach_index_path else None
+            written = top_up_unique(sorted_path, out, count, written, record_size,
+                                    make_block_function(length, alphabet, policy_args), possible, breach_index)
+        return written
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+
+def print_progress(done, total):
+    sys.stderr.write(f"\r{done}/{total} passwords")
+    sys.stderr.flush()
+
+
+def parse_minimum(value):
+    name, _, number = value.partition('=')
+    if name not in CHARACTER_CLASSES or not number.isdigit():
+        raise argparse.ArgumentTypeError(f"expected CLASS=N with CLASS one of {', '.join(CHARACTER_CLASSES)}")
+    return name, int(number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate passwords in bulk from OS randomness")
+    parser.add_argument("count", type=int, help="number of passwords")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    parser.add_argument("--length", type=int, default=16)
+    parser.add_argument("--alphabet", default=DEFAULT_ALPHABET, help="characters to draw from")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="passwords generated per block")
+    parser.add_argument("--breach-index", help="skip passwords found in this breached-hash index")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0: one per CPU)")
+    parser.add_argument("--unique", action="store_true", help="no password appears twice")
+    policy_group = parser.add_argument_group("policy", "any of these switches to uniform sampling under a policy "
+                                                       "over the standard character classes, limited to the "
+                                                       "characters of --alphabet")
+    policy_group.add_argument("--min", action="append", type=parse_minimum, default=[], metavar="CLASS=N",
+                              help="require at least N characters of a class")
+    policy_group.add_argument("--exclude-ambiguous", action="store_true",
+                              help=f"leave out {AMBIGUOUS_CHARACTERS}")
+    policy_group.add_argument("--max-repeat", type=int, help="longest allowed run of one character")
+    args = parser.parse_args()
+
+    if args.count < 0 or args.length < 1 or args.block_size < 1 or args.workers < 0:
+        parser.error("count and workers must be non-negative, length and block size positive")
+    started = time.perf_counter()
+    try:
+        alphabet_table(args.alphabet)
+        policy_args = None
+        if args.min or args.exclude_ambiguous or args.max_repeat is not None:
+            policy_args = (args.length, dict(args.min), policy_classes(args.alphabet),
+                           AMBIGUOUS_CHARACTERS if args.exclude_ambiguous else "", args.max_repeat)
+            # built here as well so an impossible policy fails before any worker starts
+            PasswordPolicy(*policy_args)
+        if args.workers != 1 or args.unique:
+            write = lambda out: write_parallel(out, args.count, args.length, args.alphabet, policy_args,
+                                               args.workers or None, args.unique, args.block_size,
+                                               args.breach_index, print_progress)
+        else:
+            breach_index = BreachIndex(args.breach_index) if args.breach_index else None
+            write = lambda out: write_blocks(out, args.count, make_block_function(args.length, args.alphabet,
+                                                                                  policy_args),
+                                             args.block_size, breach_index=breach_index)
+        if args.output == '-':
+            written = write(sys.stdout.buffer)
+            sys.stdout.flush()
+        else:
+            with open(args.output, 'wb') as out:
+                written = write(out)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.workers != 1 or args.unique:
+        sys.stderr.write("\n")
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed else 0
+    print(f"{written} passwords in {elapsed:.2f}s ({rate:,.0f} passwords/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
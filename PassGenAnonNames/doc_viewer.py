@@ -0,0 +1,147 @@
+import codecs
+import os
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QLabel, QSpinBox
+from PyQt6.QtCore import QEvent
+
+
+PAGE_SIZE = 64 << 10
+# how far past the nominal page end to look for a line break before cutting mid-line
+LINE_SEARCH = 4096
+
+
+class PagedDocument:
+    # Splits a UTF-8 file into pages of about PAGE_SIZE bytes without reading it: page starts are
+    # found by seeking, and each page ends on a line break where one is close, otherwise on a
+    # character boundary, so every page decodes on its own. The file may still be growing; call
+    # refresh() to index what has been appended since.
+    def __init__(self, path, page_size=PAGE_SIZE):
+        self.path = path
+        self.page_size = page_size
+        self.file = open(path, 'rb')
+        self.offsets = [0]
+        self.size = 0
+        self.complete = True
+        self.refresh()
+
+    def refresh(self, complete=True):
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.complete = complete
+        start = self.offsets[-1]
+        while self.size - start > self.page_size:
+            start = self.find_cut(start + self.page_size)
+            self.offsets.append(start)
+
+    def find_cut(self, pos):
+        self.file.seek(pos - 3)
+        window = self.file.read(3 + LINE_SEARCH)
+        newline = window.find(b'\n', 3)
+        if newline != -1:
+            return pos - 3 + newline + 1
+        i = 3
+        while i > 0 and window[i] & 0xC0 == 0x80:
+            i -= 1
+        return pos - 3 + i
+
+    def __len__(self):
+        if len(self.offsets) > 1 and self.offsets[-1] == self.size:
+            return len(self.offsets) - 1
+        return len(self.offsets)
+
+    def page_text(self, page):
+        start = self.offsets[page]
+        end = self.offsets[page + 1] if page + 1 < len(self.offsets) else self.size
+        self.file.seek(start)
+        data = self.file.read(end - start)
+        # a page still being written may end inside a character; hold those bytes back
+        final = self.complete or page + 1 < len(self.offsets)
+        return codecs.getincrementaldecoder('utf-8')('replace').decode(data, final=final)
+
+    def close(self):
+        self.file.close()
+
+
+class PagedTextView(QWidget):
+    # Read-only viewer that keeps a single page of a PagedDocument in its text widget. Scrolling
+    # past the bottom or top of a page with the wheel moves to the next or previous page.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = None
+        self.page = 0
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.viewport().installEventFilter(self)
+        layout.addWidget(self.view)
+
+        nav_layout = QHBoxLayout()
+        self.prev_button = QPushButton("Previous")
+        self.prev_button.clicked.connect(lambda: self.show_page(self.page - 1))
+        self.next_button = QPushButton("Next")
+        self.next_button.clicked.connect(lambda: self.show_page(self.page + 1))
+        self.page_spin = QSpinBox()
+        self.page_spin.setMinimum(1)
+        self.page_spin.editingFinished.connect(lambda: self.show_page(self.page_spin.value() - 1))
+        self.page_label = QLabel()
+        nav_layout.addWidget(self.prev_button)
+        nav_layout.addWidget(self.page_spin)
+        nav_layout.addWidget(self.page_label)
+        nav_layout.addStretch()
+        nav_layout.addWidget(self.next_button)
+        layout.addLayout(nav_layout)
+
+    def set_document(self, document):
+        self.close_document()
+        self.document = document
+        self.show_page(0)
+
+    def close_document(self):
+        if self.document is not None:
+            self.document.close()
+            self.document = None
+        self.page = 0
+        self.view.clear()
+
+    def refresh(self, complete=True):
+        # re-indexes a growing document; the last page is reloaded since it may have grown
+        if self.document is None:
+            return
+        on_last_page = self.page >= len(self.document) - 1
+        self.document.refresh(complete)
+        if on_last_page:
+            scroll = self.view.verticalScrollBar().value()
+            self.show_page(self.page)
+            self.view.verticalScrollBar().setValue(scroll)
+        else:
+            self.update_navigation()
+
+    def show_page(self, page, at_end=False):
+        if self.document is None:
+            return
+        page = max(0, min(page, len(self.document) - 1))
+        self.page = page
+        self.view.setPlainText(self.document.page_text(page))
+        scroll_bar = self.view.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum() if at_end else 0)
+        self.update_navigation()
+
+    def update_navigation(self):
+        pages = len(self.document)
+        self.page_spin.setMaximum(pages)
+        self.page_spin.setValue(self.page + 1)
+        self.page_label.setText(f"of {pages}" + ("" if self.document.complete else " (loading)"))
+        self.prev_button.setEnabled(self.page > 0)
+        self.next_button.setEnabled(self.page < pages - 1)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Wheel and self.document is not None:
+            scroll_bar = self.view.verticalScrollBar()
+            delta = event.angleDelta().y()
+            if delta < 0 and scroll_bar.value() == scroll_bar.maximum() and self.page < len(self.document) - 1:
+                self.show_page(self.page + 1)
+                return True
+            if delta > 0 and scroll_bar.value() == 0 and self.page > 0:
+                self.show_page(self.page - 1, at_end=True)
+                return True
+        return super().eventFilter(watched, event)
@@ -0,0 +1,41 @@
+import os
+import numpy as np
+
+
+BATCH_SIZE = 1 << 16
+MERGE_BLOCK = 1 << 20
+
+
+def iter_line_batches(path, batch_size=BATCH_SIZE):
+    # lists of lines as bytes without their line endings, so a huge file never sits in memory
+    with open(path, 'rb') as f:
+        batch = []
+        for line in f:
+            batch.append(line.rstrip(b'\r\n'))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def iter_merged_runs(run_paths, dtype, block=MERGE_BLOCK):
+    # Block-wise k-way merge of files of sorted, distinct records: every record up to the smallest
+    # buffered maximum among runs that still have unread data is final, so each round merges and
+    # de-duplicates those at once. Yields each sorted block with how many runs held each record.
+    runs = [np.memmap(path, dtype=dtype, mode='r') for path in run_paths if os.path.getsize(path)]
+    positions = [0] * len(runs)
+    while True:
+        active = [i for i, run in enumerate(runs) if positions[i] < len(run)]
+        if not active:
+            return
+        buffers = {i: runs[i][positions[i]:positions[i] + block] for i in active}
+        limits = [buffers[i][-1] for i in active if positions[i] + len(buffers[i]) < len(runs[i])]
+        threshold = min(limits) if limits else None
+        parts = []
+        for i in active:
+            buffer = buffers[i]
+            take = len(buffer) if threshold is None else int(np.searchsorted(buffer, threshold, side='right'))
+            parts.append(buffer[:take])
+            positions[i] += take
+        yield np.unique(np.concatenate(parts), return_counts=True)
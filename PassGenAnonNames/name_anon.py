@@ -1,82 +1,70 @@
 import sys
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QTextEdit, \
-    QLabel, QFileDialog
-import re
+    QLabel, QFileDialog, QCheckBox
+from PyQt6.QtCore import QThread, pyqtSignal
+import os
+import shutil
+import tempfile
+from name_index import get_name_index
+from pseudonym_vault import PseudonymVault
+from anon_stream import anonymize_file, anonymize_text, anonymize_to
+from doc_viewer import PagedDocument, PagedTextView
+
+
+# files at least this large are paged from disk instead of being loaded into the editor
+LARGE_FILE_SIZE = 8 << 20
 
 
 class TextProcessor:
     @staticmethod
-    def anonymize_names(text):
-        try:
-            import nltk
-            try:
-                nltk.data.find('tokenizers/punkt')
-            except LookupError:
-                nltk.download('punkt')
-            try:
-                nltk.data.find('corpora/names')
-            except LookupError:
-                nltk.download('names')
-
-            from nltk.corpus import names as nltk_names
-            name_list = set(nltk_names.words())
-        except ImportError:
-            # fallback to simple name list
-            name_list = {"John", "Michael", "David", "James", "Robert", "William", "Mary",
-                         "Jennifer", "Linda", "Elizabeth", "Susan", "Patricia", "Sarah"}
-
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        processed_sentences = []
-
-        for sentence in sentences:
-            words = sentence.split()
-            if not words:
-                processed_sentences.append(sentence)
-                continue
-
-            processed_words = []
-
-            for i, word in enumerate(words):
-                clean_word = re.sub(r'[^\w]', '', word)
-
-                if clean_word and clean_word[0].isupper() and clean_word in name_list:
-                    match = re.match(r'([A-Z][a-zA-Z]*)(.*)', word)
-                    if match:
-                        name_part, rest = match.groups()
-                        processed_words.append("xxx" + rest)
-                    else:
-                        processed_words.append(word)
-
-                elif i == 0 and clean_word and clean_word[0].isupper():
-                    if clean_word in name_list:
-                        match = re.match(r'([A-Z][a-zA-Z]*)(.*)', word)
-                        if match:
-                            name_part, rest = match.groups()
-                            processed_words.append("xxx" + rest)
-                        else:
-                            processed_words.append(word)
-                    else:
-                        processed_words.append(word)
-
-                elif clean_word and clean_word[0].isupper() and i > 0:
-                    match = re.match(r'([A-Z][a-zA-Z]*)(.*)', word)
-                    if match:
-                        name_part, rest = match.groups()
-                        processed_words.append("xxx" + rest)
-                    else:
-                        processed_words.append(word)
-                else:
-                    processed_words.append(word)
-
-            processed_sentences.append(' '.join(processed_words))
+    def anonymize_names(text, name_index=None, vault=None):
+        return anonymize_text(text, name_index, vault)
 
-        return ' '.join(processed_sentences)
+    @staticmethod
+    def anonymize_to(text, out, name_index=None, vault=None):
+        anonymize_to(text, out, name_index, vault)
+
+
+class AnonymizeFileWorker(QThread):
+    progress = pyqtSignal(int)
+    finished_file = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, input_path, output_path, name_lists, pseudonymize, parent=None):
+        super().__init__(parent)
+        self.input_path = input_path
+        self.output_path = output_path
+        self.name_lists = list(name_lists)
+        self.pseudonymize = pseudonymize
+
+    def report(self, characters):
+        if self.isInterruptionRequested():
+            raise InterruptedError("cancelled")
+        self.progress.emit(characters)
+
+    def run(self):
+        # SQLite connections belong to the thread that opened them, so the worker opens its own vault
+        vault = PseudonymVault() if self.pseudonymize else None
+        try:
+            anonymize_file(self.input_path, self.output_path, get_name_index(self.name_lists), vault=vault,
+                           progress=self.report)
+            self.finished_file.emit(self.output_path)
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            if vault is not None:
+                vault.close()
 
 
 class NameAnonymizerApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.text_processor = TextProcessor()
+        self.name_lists = []
+        self.vault = None
+        self.input_path = None
+        self.output_path = None
+        self.worker = None
         self.initUI()
 
     def initUI(self):
@@ -118,6 +106,8 @@ class NameAnonymizerApp(QMainWindow):
         input_label = QLabel("Input Text:")
         self.input_text = QTextEdit()
         self.input_text.setPlaceholderText("Enter text containing names to anonymize...")
+        self.input_view = PagedTextView()
+        self.input_view.hide()
 
         button_layout = QHBoxLayout()
 
@@ -133,32 +123,127 @@ class NameAnonymizerApp(QMainWindow):
         self.save_button = QPushButton("Save Output")
         self.save_button.clicked.connect(self.save_output)
 
+        self.names_button = QPushButton("Add Name List")
+        self.names_button.clicked.connect(self.add_name_list)
+
         button_layout.addWidget(self.anonymize_button)
         button_layout.addWidget(self.clear_button)
         button_layout.addWidget(self.load_button)
         button_layout.addWidget(self.save_button)
+        button_layout.addWidget(self.names_button)
+
+        self.pseudonym_checkbox = QCheckBox("Consistent pseudonyms")
+        self.pseudonym_checkbox.setToolTip("Replace each name with a stable token instead of xxx")
+        button_layout.addWidget(self.pseudonym_checkbox)
 
         output_label = QLabel("Anonymized Text:")
         self.output_text = QTextEdit()
         self.output_text.setReadOnly(True)
         self.output_text.setPlaceholderText("Anonymized text will appear here...")
+        self.output_view = PagedTextView()
+        self.output_view.hide()
 
         main_layout.addWidget(input_label)
         main_layout.addWidget(self.input_text)
+        main_layout.addWidget(self.input_view)
         main_layout.addLayout(button_layout)
         main_layout.addWidget(output_label)
         main_layout.addWidget(self.output_text)
+        main_layout.addWidget(self.output_view)
 
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
 
     def anonymize_text(self):
+        if self.input_path:
+            self.anonymize_large_file()
+            return
         input_text = self.input_text.toPlainText()
         if input_text:
-            anonymized_text = self.text_processor.anonymize_names(input_text)
+            vault = None
+            if self.pseudonym_checkbox.isChecked():
+                if self.vault is None:
+                    self.vault = PseudonymVault()
+                vault = self.vault
+            anonymized_text = self.text_processor.anonymize_names(input_text, get_name_index(self.name_lists), vault)
+            if vault is not None:
+                vault.flush()
             self.output_text.setPlainText(anonymized_text)
 
+    def anonymize_large_file(self):
+        if self.worker is not None:
+            return
+        self.close_output_file()
+        fd, self.output_path = tempfile.mkstemp(suffix=".txt", prefix="anonymized_")
+        os.close(fd)
+        self.output_view.set_document(PagedDocument(self.output_path))
+        self.worker = AnonymizeFileWorker(self.input_path, self.output_path, self.name_lists,
+                                          self.pseudonym_checkbox.isChecked(), self)
+        self.worker.progress.connect(self.on_file_progress)
+        self.worker.finished_file.connect(self.on_file_done)
+        self.worker.failed.connect(self.on_file_failed)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.anonymize_button.setEnabled(False)
+        self.worker.start()
+
+    def on_file_progress(self, characters):
+        self.output_view.refresh(complete=False)
+        # characters read against bytes on disk; exact for ASCII, close enough otherwise
+        percent = min(100, characters * 100 // max(1, os.path.getsize(self.input_path)))
+        self.statusBar().showMessage(f"Anonymizing... {percent}%")
+
+    def on_file_done(self, output_path):
+        self.output_view.refresh(complete=True)
+        self.statusBar().showMessage("Anonymization finished", 3000)
+
+    def on_file_failed(self, message):
+        self.output_view.refresh(complete=True)
+        self.statusBar().showMessage(f"Error anonymizing file: {message}")
+
+    def on_worker_finished(self):
+        self.worker = None
+        self.anonymize_button.setEnabled(True)
+
+    def stop_worker(self):
+        if self.worker is not None:
+            self.worker.requestInterruption()
+            self.worker.wait()
+            # drop signals still queued from the cancelled run
+            self.worker.disconnect()
+            self.worker = None
+            self.anonymize_button.setEnabled(True)
+
+    def close_output_file(self):
+        self.output_view.close_document()
+        if self.output_path:
+            try:
+                os.remove(self.output_path)
+            except OSError:
+                pass
+            self.output_path = None
+
+    def open_large_file(self, file_path):
+        self.close_large_file()
+        self.input_path = file_path
+        self.input_view.set_document(PagedDocument(file_path))
+        self.set_large_mode(True)
+        self.statusBar().showMessage(f"Opened {os.path.basename(file_path)} in large-document mode", 3000)
+
+    def close_large_file(self):
+        self.stop_worker()
+        self.close_output_file()
+        self.input_view.close_document()
+        self.input_path = None
+        self.set_large_mode(False)
+
+    def set_large_mode(self, enabled):
+        self.input_text.setVisible(not enabled)
+        self.output_text.setVisible(not enabled)
+        self.input_view.setVisible(enabled)
+        self.output_view.setVisible(enabled)
+
     def clear_texts(self):
+        self.close_large_file()
         self.input_text.clear()
         self.output_text.clear()
 
@@ -166,20 +251,49 @@ class NameAnonymizerApp(QMainWindow):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open Text File", "", "Text Files (*.txt);;All Files (*)")
         if file_path:
             try:
+                if os.path.getsize(file_path) >= LARGE_FILE_SIZE:
+                    self.open_large_file(file_path)
+                    return
+                self.close_large_file()
                 with open(file_path, 'r', encoding='utf-8') as file:
                     text = file.read()
                     self.input_text.setPlainText(text)
             except Exception as e:
                 self.output_text.setPlainText(f"Error loading file: {str(e)}")
 
+    def add_name_list(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Name List", "",
+                                                   "Text Files (*.txt);;Name Dictionaries (*.ndict);;All Files (*)")
+        if file_path:
+            try:
+                self.name_lists.append(file_path)
+                names = get_name_index(self.name_lists)
+                self.statusBar().showMessage(f"{len(names)} names loaded", 3000)
+            except Exception as e:
+                self.name_lists.remove(file_path)
+                self.output_text.setPlainText(f"Error loading name list: {str(e)}")
+
     def save_output(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Output", "", "Text Files (*.txt);;All Files (*)")
         if file_path:
             try:
+                if self.input_path:
+                    if self.worker is not None or not self.output_path:
+                        self.statusBar().showMessage("Nothing to save until anonymization has finished", 3000)
+                        return
+                    shutil.copyfile(self.output_path, file_path)
+                    return
                 with open(file_path, 'w', encoding='utf-8') as file:
                     file.write(self.output_text.toPlainText())
             except Exception as e:
-                self.output_text.setPlainText(f"Error saving file: {str(e)}")
+                if self.input_path:
+                    self.statusBar().showMessage(f"Error saving file: {str(e)}")
+                else:
+                    self.output_text.setPlainText(f"Error saving file: {str(e)}")
+
+    def closeEvent(self, event):
+        self.close_large_file()
+        super().closeEvent(event)
 
 
 def main():
@@ -0,0 +1,132 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+
+NAME_DICT_SUFFIX = ".ndict"
+MAGIC = b'NAMEDCT1'
+# magic, entry count, slot count, slot width in bytes, blob offset
+HEADER = struct.Struct('<8sQQQQ')
+LOAD_FACTOR = 0.7
+MAX_NAME_BYTES = 0xFFFF
+
+
+class NameDict:
+    # Read-only open-addressing hash table over a memory-mapped file. Slots hold 1 + the offset of a
+    # length-prefixed UTF-8 entry in the blob (0 = empty), so a lookup hashes the token once and
+    # compares bytes at a handful of probed slots. Opening only maps the file; pages are shared
+    # between every process that maps the same dictionary.
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < HEADER.size or self.mm[:len(MAGIC)] != MAGIC:
+            self.mm.close()
+            raise ValueError(f"{path} is not a name dictionary")
+        _, self.count, self.n_slots, width, self.blob_offset = HEADER.unpack_from(self.mm, 0)
+        view = memoryview(self.mm)
+        self.slots = view[HEADER.size:HEADER.size + self.n_slots * width].cast('I' if width == 4 else 'Q')
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, word):
+        if not self.n_slots:
+            return False
+        data = word.encode('utf-8')
+        size = len(data)
+        mm = self.mm
+        slots = self.slots
+        i = zlib.crc32(data) % self.n_slots
+        while True:
+            offset = slots[i]
+            if not offset:
+                return False
+            start = self.blob_offset + offset - 1
+            if mm[start] | (mm[start + 1] << 8) == size and mm[start + 2:start + 2 + size] == data:
+                return True
+            i += 1
+            if i == self.n_slots:
+                i = 0
+
+    def close(self):
+        self.slots.release()
+        self.mm.close()
+
+
+def iter_names(paths):
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                name = line.strip()
+                if name and not name.startswith('#'):
+                    yield name
+
+
+def build_name_dict(output_path, input_paths):
+    # the first pass only bounds the entry count so the table can be sized before inserting
+    upper_bound = sum(1 for _ in iter_names(input_paths))
+    n_slots = int(upper_bound / LOAD_FACTOR) + 1 if upper_bound else 0
+    slots = array('Q', bytes(8 * n_slots))
+    blob = bytearray()
+    count = 0
+    for name in iter_names(input_paths):
+        data = name.encode('utf-8')
+        size = len(data)
+        if size > MAX_NAME_BYTES:
+            continue
+        i = zlib.crc32(data) % n_slots
+        while slots[i]:
+            start = slots[i] - 1
+            if blob[start] | (blob[start + 1] << 8) == size and blob[start + 2:start + 2 + size] == data:
+                break
+            i = (i + 1) % n_slots
+        else:
+            slots[i] = len(blob) + 1
+            blob += struct.pack('<H', size)
+            blob += data
+            count += 1
+
+    width = 4 if len(blob) < 0xFFFFFFFF else 8
+    if width == 4:
+        slots = array('I', slots)
+    blob_offset = HEADER.size + n_slots * width
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, count, n_slots, width, blob_offset))
+        slots.tofile(f)
+        f.write(blob)
+    os.replace(tmp_path, output_path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a memory-mapped name dictionary")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="build a dictionary from name lists (one name per line)")
+    build_parser.add_argument("output")
+    build_parser.add_argument("inputs", nargs="+")
+    lookup_parser = subparsers.add_parser("lookup", help="check whether names are in a dictionary")
+    lookup_parser.add_argument("dictionary")
+    lookup_parser.add_argument("names", nargs="+")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            count = build_name_dict(args.output, args.inputs)
+            print(f"Wrote {count} names to {args.output}")
+        else:
+            names = NameDict(args.dictionary)
+            for name in args.names:
+                print(f"{name}: {'yes' if name in names else 'no'}")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+import pickle
+import threading
+from name_dict import NameDict, NAME_DICT_SUFFIX
+
+
+FALLBACK_NAMES = {"John", "Michael", "David", "James", "Robert", "William", "Mary",
+                  "Jennifer", "Linda", "Elizabeth", "Susan", "Patricia", "Sarah"}
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "names.cache")
+
+_indexes = {}
+_indexes_lock = threading.RLock()
+
+
+class NameIndex:
+    def __init__(self, names=()):
+        self.names = frozenset(names)
+
+    def __contains__(self, word):
+        return word in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def with_names(self, names):
+        return NameIndex(self.names.union(names))
+
+
+class CombinedNameIndex:
+    # an in-memory index plus memory-mapped dictionaries that are too large to hold as sets
+    def __init__(self, index, dictionaries):
+        self.index = index
+        self.dictionaries = dictionaries
+
+    def __contains__(self, word):
+        return word in self.index or any(word in dictionary for dictionary in self.dictionaries)
+
+    def __len__(self):
+        return len(self.index) + sum(len(dictionary) for dictionary in self.dictionaries)
+
+
+def load_nltk_names():
+    import nltk
+    try:
+        nltk.data.find('corpora/names')
+    except LookupError:
+        nltk.download('names', quiet=True)
+    from nltk.corpus import names as nltk_names
+    return nltk_names.words()
+
+
+def read_name_list(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def load_base_names(cache_file=CACHE_FILE):
+    try:
+        with open(cache_file, 'rb') as f:
+            names = pickle.load(f)
+        if isinstance(names, frozenset):
+            return names
+    except Exception:
+        # a truncated or stale cache can fail in many ways; any of them means rebuilding it
+        pass
+
+    try:
+        names = frozenset(load_nltk_names())
+    except (ImportError, LookupError):
+        # the fallback list is not cached so the corpus is picked up once it becomes available
+        return frozenset(FALLBACK_NAMES)
+
+    try:
+        tmp_file = cache_file + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(names, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Error writing name cache: {e}")
+    return names
+
+
+def get_name_index(custom_lists=()):
+    # one index per combination of custom lists, shared by every caller in the process
+    key = tuple(custom_lists)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                if key:
+                    index = get_name_index()
+                    dictionaries = []
+                    for path in key:
+                        if path.endswith(NAME_DICT_SUFFIX):
+                            dictionaries.append(NameDict(path))
+                        else:
+                            index = index.with_names(read_name_list(path))
+                    if dictionaries:
+                        index = CombinedNameIndex(index, dictionaries)
+                else:
+                    index = NameIndex(load_base_names())
+                _indexes[key] = index
+    return index
@@ -0,0 +1,45 @@
+import re
+
+
+# the replaceable part of a whitespace-delimited token that starts with an ASCII capital;
+# the capital comes first so the regex engine can skip ahead with a character-set scan
+CAPITALIZED_NAME = re.compile(r'[A-Z](?<!\S[A-Z])[a-zA-Z]*')
+TOKEN_REST = re.compile(r'\S*')
+NON_WORD = re.compile(r'[^\w]')
+SENTENCE_END = '.!?'
+
+
+def iter_name_spans(text, name_index, replacement="xxx", sentence_start=True):
+    # Capitalized words are replaced unless they open a sentence, where only known names are.
+    # A token opens a sentence when the last non-space character before it ends a sentence;
+    # sentence_start says whether text itself begins a sentence (it is False when text
+    # continues a stream whose previous part ended mid-sentence).
+    rest = TOKEN_REST.match
+    for match in CAPITALIZED_NAME.finditer(text):
+        start, end = match.span()
+        i = start - 2
+        if i >= 0 and not text[i].isspace():
+            if text[i] not in SENTENCE_END:
+                yield start, end, replacement
+                continue
+        else:
+            while i >= 0 and text[i].isspace():
+                i -= 1
+            opens_sentence = text[i] in SENTENCE_END if i >= 0 else sentence_start
+            if not opens_sentence:
+                yield start, end, replacement
+                continue
+        token = match.group() + rest(text, end).group()
+        if NON_WORD.sub('', token) in name_index:
+            yield start, end, replacement
+
+
+def write_spans(text, spans, out, start=0, end=None):
+    # copies text[start:end] to out, substituting each span; everything between spans is written verbatim
+    write = out.write
+    last = start
+    for span_start, span_end, replacement in spans:
+        write(text[last:span_start])
+        write(replacement)
+        last = span_end
+    write(text[last:end])
@@ -1,9 +1,11 @@
 import sys
-import random
-import string
+from password_policy import PasswordPolicy, CHARACTER_CLASSES, AMBIGUOUS_CHARACTERS, default_policy
+from password_strength import estimate_strength, SCORE_LABELS
+from breach_screen import open_default_index
+from passphrase import PassphraseGenerator, WordIndex, CAPITALIZATION, default_wordlist_path
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QPushButton, QSpinBox,
-                             QLineEdit, QGroupBox, QCheckBox)
+                             QLineEdit, QGroupBox, QCheckBox, QComboBox, QFileDialog)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont, QIcon
 
@@ -11,6 +13,11 @@ from PyQt6.QtGui import QFont, QIcon
 class PasswordGenerator(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.policies = {}
+        self.breach_index = open_default_index()
+        self.wordlist = None
+        # the last generated password and its generator's entropy
+        self.generated = None
         self.setWindowTitle("Password Generator")
         self.setGeometry(100, 100, 500, 400)
         self.setStyleSheet("background-color: #2c3e50; color: #ecf0f1;")
@@ -35,7 +42,7 @@ class PasswordGenerator(QMainWindow):
             "QGroupBox { border: 1px solid #3498db; border-radius: 5px; margin-top: 10px; } QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 5px; }")
         length_layout = QVBoxLayout(length_group)
 
-        pattern_label = QLabel("Default pattern: 3 digits + 3 punctuation + 3 uppercase + 3 lowercase")
+        pattern_label = QLabel("Default policy: 12 characters with 3 digits, 3 punctuation, 3 uppercase and 3 lowercase")
         pattern_label.setStyleSheet("color: #f39c12;")
         length_layout.addWidget(pattern_label)
 
@@ -73,11 +80,44 @@ class PasswordGenerator(QMainWindow):
         char_layout.addWidget(self.use_uppercase)
         char_layout.addWidget(self.use_lowercase)
 
+        self.exclude_ambiguous = QCheckBox(f"Exclude ambiguous characters ({AMBIGUOUS_CHARACTERS})")
+        self.no_repeats = QCheckBox("No repeated characters in a row")
+        char_layout.addWidget(self.exclude_ambiguous)
+        char_layout.addWidget(self.no_repeats)
+
         self.char_options.setEnabled(False)
         length_layout.addWidget(self.char_options)
 
         main_layout.addWidget(length_group)
 
+        self.passphrase_group = QGroupBox("Passphrase instead of password")
+        self.passphrase_group.setCheckable(True)
+        self.passphrase_group.setChecked(False)
+        self.passphrase_group.setStyleSheet(
+            "QGroupBox { border: 1px solid #3498db; border-radius: 5px; margin-top: 10px; } QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 5px; }")
+        passphrase_layout = QHBoxLayout(self.passphrase_group)
+        self.words_spin = QSpinBox()
+        self.words_spin.setRange(3, 12)
+        self.words_spin.setValue(6)
+        self.separator_edit = QLineEdit("-")
+        self.separator_edit.setMaxLength(3)
+        self.separator_edit.setFixedWidth(40)
+        self.capitalization_combo = QComboBox()
+        self.capitalization_combo.addItems(CAPITALIZATION)
+        self.digits_spin = QSpinBox()
+        self.digits_spin.setRange(0, 4)
+        wordlist_btn = QPushButton("Wordlist...")
+        wordlist_btn.clicked.connect(self.choose_wordlist)
+        passphrase_layout.addWidget(QLabel("Words:"))
+        passphrase_layout.addWidget(self.words_spin)
+        passphrase_layout.addWidget(QLabel("Separator:"))
+        passphrase_layout.addWidget(self.separator_edit)
+        passphrase_layout.addWidget(self.capitalization_combo)
+        passphrase_layout.addWidget(QLabel("Digits:"))
+        passphrase_layout.addWidget(self.digits_spin)
+        passphrase_layout.addWidget(wordlist_btn)
+        main_layout.addWidget(self.passphrase_group)
+
         custom_length_checkbox.toggled.connect(self.toggle_custom_mode)
 
         result_group = QGroupBox("Generated Password")
@@ -86,12 +126,16 @@ class PasswordGenerator(QMainWindow):
         result_layout = QVBoxLayout(result_group)
 
         self.password_display = QLineEdit()
-        self.password_display.setReadOnly(True)
         self.password_display.setStyleSheet(
             "background-color: #34495e; border: 1px solid #3498db; border-radius: 3px; padding: 8px; font-family: monospace; font-size: 14px; color: #2ecc71;")
         self.password_display.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.password_display.textChanged.connect(self.update_strength)
         result_layout.addWidget(self.password_display)
 
+        self.strength_label = QLabel()
+        self.strength_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        result_layout.addWidget(self.strength_label)
+
         main_layout.addWidget(result_group)
 
         button_layout = QHBoxLayout()
@@ -135,34 +179,81 @@ class PasswordGenerator(QMainWindow):
         self.length_spin.setEnabled(checked)
         self.char_options.setEnabled(checked)
 
-    def generate_password(self):
-        if self.length_spin.isEnabled():
-            length = self.length_spin.value()
-            chars = ""
-            if self.use_digits.isChecked():
-                chars += string.digits
-            if self.use_punctuation.isChecked():
-                chars += string.punctuation
-            if self.use_uppercase.isChecked():
-                chars += string.ascii_uppercase
-            if self.use_lowercase.isChecked():
-                chars += string.ascii_lowercase
-
-            if not chars:
-                self.password_display.setText("Error: Select at least one character type!")
+    def choose_wordlist(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Wordlist", "", "Text Files (*.txt);;All Files (*)")
+        if file_path:
+            try:
+                wordlist = WordIndex(file_path)
+            except (OSError, ValueError) as e:
+                self.password_display.setText(f"Error loading wordlist: {e}")
                 return
-
-            password = ''.join(random.choice(chars) for _ in range(length))
+            if self.wordlist is not None:
+                self.wordlist.close()
+            self.wordlist = wordlist
+            self.statusBar().showMessage(f"{len(wordlist)} words loaded", 3000)
+
+    def current_passphrase_generator(self):
+        if self.wordlist is None:
+            path = default_wordlist_path()
+            if path is None:
+                raise ValueError("Choose a wordlist for passphrases")
+            self.wordlist = WordIndex(path)
+        return PassphraseGenerator(self.wordlist, self.words_spin.value(), self.separator_edit.text(),
+                                   self.capitalization_combo.currentText(), self.digits_spin.value())
+
+    def current_policy(self):
+        if self.passphrase_group.isChecked():
+            return self.current_passphrase_generator()
+        if not self.length_spin.isEnabled():
+            key = None
         else:
-            digits = ''.join(random.choice(string.digits) for _ in range(3))
-            punctuation = ''.join(random.choice(string.punctuation) for _ in range(3))
-            uppercase = ''.join(random.choice(string.ascii_uppercase) for _ in range(3))
-            lowercase = ''.join(random.choice(string.ascii_lowercase) for _ in range(3))
-
-            password = digits + punctuation + uppercase + lowercase
+            checked = {"digits": self.use_digits, "punctuation": self.use_punctuation,
+                       "uppercase": self.use_uppercase, "lowercase": self.use_lowercase}
+            names = tuple(name for name, checkbox in checked.items() if checkbox.isChecked())
+            key = (self.length_spin.value(), names, self.exclude_ambiguous.isChecked(), self.no_repeats.isChecked())
+        # building a policy precomputes its counts, so each distinct setting is built once
+        policy = self.policies.get(key)
+        if policy is None:
+            if key is None:
+                policy = default_policy()
+            else:
+                length, names, exclude_ambiguous, no_repeats = key
+                if not names:
+                    raise ValueError("Select at least one character type!")
+                policy = PasswordPolicy(length, {name: 1 for name in names},
+                                        {name: CHARACTER_CLASSES[name] for name in names},
+                                        AMBIGUOUS_CHARACTERS if exclude_ambiguous else "",
+                                        1 if no_repeats else None)
+            self.policies[key] = policy
+        return policy
 
+    def generate_password(self):
+        try:
+            policy = self.current_policy()
+            if self.breach_index is None:
+                password = policy.generate()
+            else:
+                password = self.breach_index.draw(policy.generate)
+        except (OSError, ValueError) as e:
+            self.password_display.setText(f"Error: {e}")
+            self.strength_label.clear()
+            return
+
+        self.generated = (password, policy.entropy())
         self.password_display.setText(password)
 
+    def update_strength(self, password):
+        # scores whatever is in the field, so edited or pasted passwords are checked too; the
+        # generator's entropy is shown while the field still holds what it generated
+        if not password:
+            self.strength_label.clear()
+            return
+        bits, score = estimate_strength(password)
+        text = f"Strength: {SCORE_LABELS[score]} (~{bits:.0f} bits)"
+        if self.generated is not None and self.generated[0] == password:
+            text += f" | generator: {self.generated[1]:.0f} bits"
+        self.strength_label.setText(text)
+
     def copy_to_clipboard(self):
         if self.password_display.text():
             clipboard = QApplication.clipboard()
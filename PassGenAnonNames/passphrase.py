@@ -0,0 +1,213 @@
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bulk_passwords import random_indices
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WORDLIST = os.path.join(BASE_DIR, "wordlist.txt")
+INDEX_SUFFIX = ".idx"
+MAGIC = b'WORDIDX2'
+# magic, word count, words that change when capitalized, source size, source modification time (ns)
+HEADER = struct.Struct('<8sQQQQ')
+CAPITALIZATION = ["lower", "title", "random"]
+BATCH_SIZE = 1 << 14
+
+
+def is_cased(word):
+    # whether capitalizing the word changes it, so a random capital is a real choice
+    first = word[:4].decode('utf-8', 'ignore')[:1]
+    return first.upper() != first
+
+
+def scan_words(path):
+    # byte (start, end) of every word, and how many of them are cased; Diceware lists prefix each
+    # word with its dice roll
+    offsets = array('Q')
+    cased = 0
+    position = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            fields = line.split()
+            if fields and not fields[0].startswith(b'#'):
+                word = fields[-1]
+                start = position + line.rindex(word)
+                offsets.append(start)
+                offsets.append(start + len(word))
+                cased += is_cased(word)
+            position += len(line)
+    return offsets, cased
+
+
+def build_word_index(path, index_path):
+    offsets, cased = scan_words(path)
+    stat = os.stat(path)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(offsets) // 2, cased, stat.st_size, stat.st_mtime_ns))
+        offsets.tofile(f)
+    os.replace(tmp_path, index_path)
+
+
+class WordIndex:
+    # Random access to the words of a wordlist file without reading it: a side file holds the
+    # byte offsets of every word, and both files are memory-mapped. The index is rebuilt when the
+    # wordlist changes; if it cannot be written, the offsets are kept in memory instead.
+    def __init__(self, path):
+        self.path = path
+        self.index_mm = None
+        with open(path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                raise ValueError(f"{path} is empty")
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        index_path = path + INDEX_SUFFIX
+        try:
+            if not self.index_is_current(index_path):
+                build_word_index(path, index_path)
+            with open(index_path, 'rb') as f:
+                self.index_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            _, self.count, self.cased, _, _ = HEADER.unpack_from(self.index_mm, 0)
+            self.offsets = memoryview(self.index_mm)[HEADER.size:].cast('Q')
+        except OSError:
+            self.offsets, self.cased = scan_words(path)
+            self.count = len(self.offsets) // 2
+        if not self.count:
+            raise ValueError(f"no words in {path}")
+
+    def index_is_current(self, index_path):
+        try:
+            with open(index_path, 'rb') as f:
+                magic, _, _, size, mtime_ns = HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return False
+        stat = os.stat(self.path)
+        return magic == MAGIC and size == stat.st_size and mtime_ns == stat.st_mtime_ns
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return self.mm[self.offsets[2 * i]:self.offsets[2 * i + 1]].decode('utf-8', 'replace')
+
+    def close(self):
+        if self.index_mm is not None:
+            self.offsets.release()
+            self.index_mm.close()
+        self.mm.close()
+
+
+def default_wordlist_path():
+    # like the name corpus, the NLTK word corpus is used when no wordlist has been provided
+    if os.path.exists(DEFAULT_WORDLIST):
+        return DEFAULT_WORDLIST
+    try:
+        import nltk
+        try:
+            nltk.data.find('corpora/words')
+        except LookupError:
+            nltk.download('words', quiet=True)
+        from nltk.corpus import words as nltk_words
+        words = sorted({w.lower() for w in nltk_words.words() if w.isalpha() and w.isascii() and 3 <= len(w) <= 9})
+    except (ImportError, LookupError):
+        return None
+    with open(DEFAULT_WORDLIST, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(words) + '\n')
+    return DEFAULT_WORDLIST
+
+
+def placement_entropy(digits, words):
+    # Entropy of how many of `digits` uniform draws land on each of `words` words: the draws'
+    # log2(words ** digits) less the expected log2 of the orders giving the same counts, which by
+    # symmetry needs only the binomial count of one word.
+    if not digits or words == 1:
+        return 0.0
+    p = 1 / words
+    expected_log_factorials = sum(math.comb(digits, k) * p ** k * (1 - p) ** (digits - k) * math.lgamma(k + 1)
+                                  for k in range(2, digits + 1))
+    return digits * math.log2(words) - (math.lgamma(digits + 1) - words * expected_log_factorials) / math.log(2)
+
+
+class PassphraseGenerator:
+    def __init__(self, wordlist, words=6, separator="-", capitalization="lower", digits=0):
+        if capitalization not in CAPITALIZATION:
+            raise ValueError(f"capitalization must be one of {', '.join(CAPITALIZATION)}")
+        if words < 1:
+            raise ValueError("a passphrase needs at least one word")
+        self.wordlist = wordlist
+        self.words = words
+        self.separator = separator
+        self.capitalization = capitalization
+        self.digits = digits
+
+    def entropy(self):
+        # Bits of the choices that show in the passphrase: each word; a random capital only when
+        # the word has a case, which the index counted; and each digit's value and the word it
+        # joins, where only how many digits each word gets is visible, not the order they were
+        # placed in.
+        bits = self.words * math.log2(len(self.wordlist))
+        if self.capitalization == "random":
+            bits += self.words * self.wordlist.cased / len(self.wordlist)
+        return bits + self.digits * math.log2(10) + placement_entropy(self.digits, self.words)
+
+    def generate_many(self, count):
+        n = self.words
+        indices = random_indices(count * n, len(self.wordlist)).tolist()
+        capitals = random_indices(count * n, 2).tolist() if self.capitalization == "random" else None
+        digit_words = random_indices(count * self.digits, n).tolist()
+        digit_values = random_indices(count * self.digits, 10).tolist()
+        phrases = []
+        for p in range(count):
+            words = [self.wordlist[i] for i in indices[p * n:(p + 1) * n]]
+            if self.capitalization == "title":
+                words = [w[:1].upper() + w[1:] for w in words]
+            elif capitals is not None:
+                words = [w[:1].upper() + w[1:] if up else w for w, up in zip(words, capitals[p * n:(p + 1) * n])]
+            for d in range(p * self.digits, (p + 1) * self.digits):
+                words[digit_words[d]] += str(digit_values[d])
+            phrases.append(self.separator.join(words))
+        return phrases
+
+    def generate(self):
+        return self.generate_many(1)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Diceware-style passphrases from a wordlist")
+    parser.add_argument("count", type=int, help="number of passphrases")
+    parser.add_argument("--wordlist", help="one word per line, optionally after a dice roll (default: wordlist.txt)")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    parser.add_argument("--words", type=int, default=6)
+    parser.add_argument("--separator", default="-")
+    parser.add_argument("--capitalization", choices=CAPITALIZATION, default="lower")
+    parser.add_argument("--digits", type=int, default=0, help="random digits appended to random words")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        path = args.wordlist or default_wordlist_path()
+        if path is None:
+            raise ValueError("no wordlist given and the NLTK word corpus is unavailable")
+        generator = PassphraseGenerator(WordIndex(path), args.words, args.separator, args.capitalization,
+                                        args.digits)
+        out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+        with out:
+            written = 0
+            while written < args.count:
+                n = min(BATCH_SIZE, args.count - written)
+                out.write('\n'.join(generator.generate_many(n)) + '\n')
+                written += n
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+    print(f"{written} passphrases ({generator.entropy():.0f} bits each) in {elapsed:.2f}s "
+          f"({written / elapsed if elapsed else 0:,.0f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
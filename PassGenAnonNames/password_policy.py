@@ -0,0 +1,233 @@
+import itertools
+import math
+import secrets
+from bisect import bisect_right
+import string
+
+
+CHARACTER_CLASSES = {
+    "digits": string.digits,
+    "punctuation": string.punctuation,
+    "uppercase": string.ascii_uppercase,
+    "lowercase": string.ascii_lowercase,
+}
+AMBIGUOUS_CHARACTERS = "Il1|O0o`'\""
+MAX_LENGTH = 4096
+# exact counts kept for a policy with max_repeat: one per (remaining length, state)
+MAX_STATES = 250_000
+
+_shuffler = secrets.SystemRandom()
+
+
+class PasswordPolicy:
+    # Samples uniformly from every password the policy allows. Classes without a minimum are
+    # merged into one free pool, since only the classes still below their minimum have to be
+    # told apart.
+    # Without max_repeat, a password is a choice of how many characters each constrained class
+    # gets, a placement of those characters and then the characters themselves. Counts of the
+    # first step are tabulated once per class and remaining length (exact integers, by inclusion
+    # and exclusion over the minimums); a password then draws the class counts in proportion to
+    # the passwords they allow, shuffles the positions and picks each character uniformly.
+    # With max_repeat the next character depends on the one before, so completions are counted
+    # bottom-up per remaining length, unmet minimums, group of the last character and length of
+    # its run; a class joins the free pool once its minimum is met. Policies whose state space is
+    # too large to count are refused up front.
+    def __init__(self, length, minimums=None, classes=None, exclude="", max_repeat=None):
+        classes = classes if classes is not None else CHARACTER_CLASSES
+        minimums = minimums or {}
+        unknown = set(minimums) - set(classes)
+        if unknown:
+            raise ValueError(f"unknown character class: {', '.join(sorted(unknown))}")
+        if type(length) is not int or not 1 <= length <= MAX_LENGTH:
+            raise ValueError(f"length must be between 1 and {MAX_LENGTH}")
+        if any(type(minimum) is not int or minimum < 0 for minimum in minimums.values()):
+            raise ValueError("minimums must be non-negative integers")
+        if sum(minimums.values()) > length:
+            raise ValueError("no password satisfies this policy: the minimums add up to more than the length")
+        if max_repeat is not None and (type(max_repeat) is not int or max_repeat < 1):
+            raise ValueError("max_repeat must be a positive integer")
+        self.length = length
+        self.max_repeat = max_repeat if max_repeat and max_repeat < length else None
+        # constrained classes, in order, and the free pool of every class without a minimum
+        self.alphabets = []
+        self.minimums = []
+        self.free = ""
+        for name, chars in classes.items():
+            chars = ''.join(c for c in chars if c not in exclude)
+            if not chars:
+                if minimums.get(name):
+                    raise ValueError(f"no {name} left after exclusions")
+                continue
+            if minimums.get(name):
+                self.alphabets.append(chars)
+                self.minimums.append(minimums[name])
+            else:
+                self.free += chars
+        if not self.alphabets and not self.free:
+            raise ValueError("no characters to choose from")
+        if self.max_repeat is None:
+            self.total = self.build_tables()
+        else:
+            self.total = self.build_counts()
+        if not self.total:
+            raise ValueError("no password satisfies this policy")
+
+    def count(self):
+        # number of passwords the policy allows
+        return self.total
+
+    # -- without max_repeat: class counts, then placement --
+
+    def build_tables(self):
+        # tables[j][n]: strings of n characters from classes j.. and the free pool that meet the
+        # minimums of classes j..
+        self.tables = [None] * (len(self.alphabets) + 1)
+        self.tables[0] = self.table(0, len(self.free))
+        return self.tables[0][self.length]
+
+    def table(self, j, free):
+        # Counts for classes j.. with a free pool of `free` characters: every string, with class j
+        # counted as free, less those short of its minimum. Each table costs O(length * minimum) and
+        # there is one per subset of the classes, which keeps long passwords cheap.
+        if j == len(self.alphabets):
+            return [free ** n for n in range(self.length + 1)]
+        size, minimum = len(self.alphabets[j]), self.minimums[j]
+        merged, rest = self.table(j + 1, free + size), self.table(j + 1, free)
+        if free == len(self.free):
+            self.tables[j + 1] = rest
+        return [merged[n] - sum(math.comb(n, k) * size ** k * rest[n - k] for k in range(min(minimum, n + 1)))
+                for n in range(self.length + 1)]
+
+    def class_weights(self, j, n):
+        # (k, strings of n characters with exactly k from class j and the rest counted by the next table)
+        size, minimum, rest = len(self.alphabets[j]), self.minimums[j], self.tables[j + 1]
+        ways = math.comb(n, minimum) * size ** minimum
+        for k in range(minimum, n + 1):
+            yield k, ways * rest[n - k]
+            ways = ways * (n - k) * size // (k + 1)
+
+    def generate_placed(self):
+        labels = []
+        remaining = self.length
+        for j in range(len(self.alphabets)):
+            target = secrets.randbelow(self.tables[j][remaining])
+            for k, weight in self.class_weights(j, remaining):
+                if target < weight:
+                    break
+                target -= weight
+            labels += [j] * k
+            remaining -= k
+        labels += [len(self.alphabets)] * remaining
+        _shuffler.shuffle(labels)
+        alphabets = self.alphabets + [self.free]
+        return ''.join(secrets.choice(alphabets[j]) for j in labels)
+
+    # -- with max_repeat: completions per state --
+
+    def build_counts(self):
+        # a state is (unmet minimums, group of the last character, run); the group is a class index
+        # while that class is still short, or `free` once the character counts towards no minimum
+        free = len(self.alphabets)
+        states = []
+        for needs in itertools.product(*(range(minimum + 1) for minimum in self.minimums)):
+            for last in [free] + [j for j in range(free) if needs[j]]:
+                states.extend((needs, last, run) for run in range(1, self.max_repeat + 1))
+        if self.length * len(states) > MAX_STATES:
+            raise ValueError("policy is too complex to sample exactly; lower the length or minimums, "
+                             "or drop max_repeat")
+        self.pools = {}
+        self.steps = {}
+        self.moves = {state: list(self.transitions(*state)) for state in states}
+        start = (tuple(self.minimums), None, 0)
+        self.moves[start] = list(self.transitions(*start))
+        self.counts = [{state: 1 for state in states if not any(state[0])}]
+        for remaining in range(1, self.length + 1):
+            previous = self.counts[-1]
+            current = {}
+            for state in (states if remaining < self.length else [start]):
+                if sum(state[0]) > remaining:
+                    continue
+                total = sum(ways * previous.get(after, 0) for ways, after, _ in self.moves[state])
+                if total:
+                    current[state] = total
+            self.counts.append(current)
+        return self.counts[self.length].get(start, 0)
+
+    def pool(self, needs):
+        # the free pool plus every class whose minimum is met
+        pool = self.pools.get(needs)
+        if pool is None:
+            pool = self.pools[needs] = self.free + ''.join(chars for chars, need in zip(self.alphabets, needs)
+                                                           if not need)
+        return pool
+
+    def transitions(self, needs, last, run):
+        # (ways, state after, group drawn from or None to repeat) for every kind of next character
+        free = len(self.alphabets)
+
+        def after(group, next_run):
+            if group == free:
+                return needs, free, next_run
+            next_needs = needs[:group] + (needs[group] - 1,) + needs[group + 1:]
+            return next_needs, group if next_needs[group] else free, next_run
+
+        if last is not None and run < self.max_repeat:
+            yield 1, after(last, run + 1), None
+        for group in [j for j in range(free) if needs[j]] + [free]:
+            size = len(self.pool(needs)) if group == free else len(self.alphabets[group])
+            others = size - (group == last)
+            if others:
+                yield others, after(group, 1), group
+
+    def options(self, remaining, state):
+        # cumulative completion counts of the possible next characters, so a step is one bisect
+        key = (remaining, state)
+        step = self.steps.get(key)
+        if step is None:
+            bounds = []
+            moves = []
+            total = 0
+            following = self.counts[remaining - 1]
+            for ways, after, group in self.moves[state]:
+                weight = ways * following.get(after, 0)
+                if weight:
+                    total += weight
+                    bounds.append(total)
+                    moves.append((after, group))
+            step = self.steps[key] = (bounds, moves)
+        return step
+
+    def generate_limited(self):
+        password = []
+        state = (tuple(self.minimums), None, 0)
+        previous = None
+        for remaining in range(self.length, 0, -1):
+            needs, last = state[0], state[1]
+            bounds, moves = self.options(remaining, state)
+            state, group = moves[bisect_right(bounds, secrets.randbelow(bounds[-1]))]
+            if group is not None:
+                chars = self.pool(needs) if group == len(self.alphabets) else self.alphabets[group]
+                if group == last:
+                    # any character of the group except the previous one
+                    i = secrets.randbelow(len(chars) - 1)
+                    index = chars.index(previous)
+                    previous = chars[i + (i >= index)]
+                else:
+                    previous = secrets.choice(chars)
+            password.append(previous)
+        return ''.join(password)
+
+    def generate(self):
+        return self.generate_placed() if self.max_repeat is None else self.generate_limited()
+
+    def entropy(self):
+        # bits of a password drawn uniformly from the policy
+        return math.log2(self.count())
+
+    def generate_many(self, count):
+        return [self.generate() for _ in range(count)]
+
+
+def default_policy():
+    # the app's default: 12 characters with three of each class, placed anywhere
+    return PasswordPolicy(12, {name: 3 for name in CHARACTER_CLASSES})
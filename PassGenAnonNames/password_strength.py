@@ -0,0 +1,307 @@
+import argparse
+import csv
+import math
+import sys
+import time
+import numpy as np
+from file_batches import BATCH_SIZE, iter_line_batches
+
+
+# longer passwords are scored on their first MAX_SCORED_LENGTH characters, which can only lower the estimate
+MAX_SCORED_LENGTH = 64
+# buckets of the filter on the first three bytes of words, which spares most substrings a lookup
+PREFIX_BUCKETS = 1 << 20
+# bits at which a password moves up one score: 0 very weak .. 4 very strong
+SCORE_THRESHOLDS = [28, 36, 60, 80]
+SCORE_LABELS = ["Very weak", "Weak", "Fair", "Strong", "Very strong"]
+# cost of a character that repeats, continues a sequence (abc, 321) or walks the keyboard from the previous one
+REPEAT_BITS = 1.0
+SEQUENCE_BITS = 1.0
+WALK_BITS = 2.0
+
+COMMON_PASSWORDS = [
+    "password", "123456", "123456789", "qwerty", "12345678", "111111", "1234567", "sunshine", "iloveyou",
+    "princess", "admin", "welcome", "666666", "abc123", "football", "123123", "monkey", "654321", "charlie",
+    "aa123456", "donald", "password1", "qwerty123", "letmein", "dragon", "baseball", "master", "shadow",
+    "superman", "michael", "trustno1", "batman", "access", "hello", "freedom", "whatever", "login", "starwars",
+    "secret", "summer", "winter", "spring", "autumn", "love", "ninja", "mustang", "jordan", "hunter", "ranger",
+    "buster", "soccer", "hockey", "killer", "george", "andrew", "thomas", "jessica", "pepper", "daniel",
+    "computer", "internet", "google", "cheese", "flower", "orange", "banana", "purple", "yellow", "silver",
+    "company", "changeme", "default", "test", "guest", "root", "user", "pass", "qazwsx", "zaq12wsx", "asdfgh",
+]
+# everyday words, ranked after the passwords, so phrases glued from them are found word by word
+COMMON_WORDS = [
+    "the", "and", "you", "that", "was", "for", "are", "with", "his", "they", "one", "have", "this", "from", "had",
+    "not", "but", "what", "all", "were", "when", "your", "can", "said", "there", "use", "each", "which", "she",
+    "how", "their", "will", "other", "about", "out", "many", "then", "them", "these", "some", "her", "would", "make",
+    "like", "him", "into", "time", "has", "look", "two", "more", "write", "see", "number", "way", "could", "people",
+    "than", "first", "water", "been", "call", "who", "its", "now", "find", "long", "down", "day", "did", "get",
+    "come", "made", "may", "part", "over", "new", "sound", "take", "only", "little", "work", "know", "place", "year",
+    "live", "back", "give", "most", "very", "after", "thing", "our", "just", "name", "good", "sentence", "man",
+    "think", "say", "great", "where", "help", "through", "much", "before", "line", "right", "too", "mean", "old",
+    "any", "same", "tell", "boy", "follow", "came", "want", "show", "also", "around", "form", "three", "small",
+    "set", "put", "end", "does", "another", "well", "large", "must", "big", "even", "such", "because", "turn",
+    "here", "why", "ask", "went", "men", "read", "need", "land", "different", "home", "move", "try", "kind", "hand",
+    "picture", "again", "change", "off", "play", "spell", "air", "away", "animal", "house", "point", "page",
+    "letter", "mother", "answer", "found", "study", "still", "learn", "should", "world", "high", "every", "near",
+    "add", "food", "between", "own", "below", "country", "plant", "last", "school", "father", "keep", "tree",
+    "never", "start", "city", "earth", "eye", "light", "thought", "head", "under", "story", "saw", "left", "few",
+    "while", "along", "might", "close", "something", "seem", "next", "hard", "open", "example", "begin", "life",
+    "always", "those", "both", "paper", "together", "got", "group", "often", "run", "important", "until", "children",
+    "side", "feet", "car", "mile", "night", "walk", "white", "sea", "began", "grow", "took", "river", "four",
+    "carry", "state", "once", "book", "hear", "stop", "without", "second", "later", "miss", "idea", "enough", "eat",
+    "face", "watch", "far", "really", "almost", "let", "above", "girl", "sometimes", "mountain", "cut", "young",
+    "talk", "soon", "list", "song", "being", "leave", "family", "music", "color", "blue", "red", "green", "black",
+    "gold", "fire", "sun", "moon", "star", "sky", "rain", "snow", "wind", "stone", "rock", "door", "window", "table",
+    "chair", "bed", "room", "wall", "money", "phone", "key", "lock", "horse", "dog", "cat", "bird", "fish", "bear",
+    "lion", "tiger", "wolf", "apple", "bread", "coffee", "battery", "staple", "correct", "pencil", "happy", "sweet",
+    "heart", "angel", "magic", "power", "king", "queen", "prince", "baby", "friend", "lucky", "smile", "dream",
+    "peace", "hope", "forever", "secret", "super", "cool", "best", "crazy",
+]
+
+LOWER, UPPER, DIGIT, SYMBOL, OTHER = 1, 2, 4, 8, 16
+CLASS_SIZES = {LOWER: 26, UPPER: 26, DIGIT: 10, SYMBOL: 33, OTHER: 100}
+LEET = {'0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '@': 'a', '$': 's', '!': 'i'}
+KEYBOARD_ROWS = ["`1234567890-=", "qwertyuiop[]\\", "asdfghjkl;'", "zxcvbnm,./"]
+SHIFTED_ROWS = ["~!@#$%^&*()_+", "QWERTYUIOP{}|", 'ASDFGHJKL:"', "ZXCVBNM<>?"]
+
+
+def build_tables():
+    char_class = np.zeros(256, dtype=np.uint8)
+    for code in range(256):
+        c = chr(code)
+        if 'a' <= c <= 'z':
+            char_class[code] = LOWER
+        elif 'A' <= c <= 'Z':
+            char_class[code] = UPPER
+        elif '0' <= c <= '9':
+            char_class[code] = DIGIT
+        elif 32 <= code < 127:
+            char_class[code] = SYMBOL
+        elif code:
+            char_class[code] = OTHER
+
+    # log2 of the character set implied by each combination of classes present
+    charset_bits = np.zeros(32)
+    for mask in range(1, 32):
+        charset_bits[mask] = math.log2(sum(size for cls, size in CLASS_SIZES.items() if mask & cls))
+
+    lowered = np.arange(256, dtype=np.uint8)
+    lowered[ord('A'):ord('Z') + 1] += 32
+    normalized = lowered.copy()
+    is_leet = np.zeros(256, dtype=bool)
+    for c, letter in LEET.items():
+        normalized[ord(c)] = ord(letter)
+        is_leet[ord(c)] = True
+
+    # staggered layout: a key touches its row neighbours, the two keys above it and the two below
+    positions = {}
+    for rows in (KEYBOARD_ROWS, SHIFTED_ROWS):
+        for r, row in enumerate(rows):
+            for col, c in enumerate(row):
+                positions[c] = (r, col)
+    adjacent = np.zeros((256, 256), dtype=bool)
+    for a, (ra, ca) in positions.items():
+        for b, (rb, cb) in positions.items():
+            if (ra == rb and abs(ca - cb) == 1) or (rb == ra - 1 and cb in (ca, ca + 1)) \
+                    or (rb == ra + 1 and cb in (ca - 1, ca)):
+                adjacent[ord(a), ord(b)] = True
+    return char_class, charset_bits, lowered, normalized, is_leet, adjacent
+
+
+CHAR_CLASS, CHARSET_BITS, LOWERED, NORMALIZED, IS_LEET, ADJACENT = build_tables()
+
+
+def trigram_codes(text):
+    # a bucket for every three consecutive bytes of each row
+    codes = text[:, :-2].astype(np.uint32) << 16 | text[:, 1:-1].astype(np.uint32) << 8 | text[:, 2:]
+    return codes % PREFIX_BUCKETS
+
+
+class Wordlist:
+    # sorted byte strings with their popularity rank, searched for a whole batch at once; they are
+    # stored at the width of the longest word, so a lookup never copies the list
+    def __init__(self, words):
+        ranks = {}
+        for word in words:
+            word = word.strip().lower()
+            # passwords are matched as ASCII, so other words could never be found
+            if len(word) >= 3 and word.isascii() and word not in ranks:
+                ranks[word] = len(ranks)
+        ordered = sorted(ranks)
+        self.words = np.array([word.encode('utf-8') for word in ordered] or [b''])
+        self.ranks = np.array([ranks[word] for word in ordered] or [0])
+        self.width = self.words.dtype.itemsize
+        self.prefixes = np.zeros(PREFIX_BUCKETS, dtype=bool)
+        self.prefixes[trigram_codes(self.words.view(np.uint8).reshape(len(self.words), -1)[:, :3])] = True
+
+    def __len__(self):
+        return len(self.ranks)
+
+    def rank(self, candidates):
+        # rank of each candidate, or -1 if it is not a word; a candidate longer than every word
+        # would be cut short by the cast, so it has to survive the cast unchanged
+        fitted = candidates.astype(f'S{self.width}')
+        index = np.minimum(np.searchsorted(self.words, fitted), len(self.words) - 1)
+        found = (self.words[index] == fitted) & (fitted == candidates) & (candidates != b'')
+        return np.where(found, self.ranks[index], -1)
+
+
+def load_wordlist(path=None):
+    words = COMMON_PASSWORDS + COMMON_WORDS
+    if path:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            words.extend(line for line in f if line.strip())
+    return Wordlist(words)
+
+
+_default_wordlist = None
+
+
+def default_wordlist():
+    global _default_wordlist
+    if _default_wordlist is None:
+        _default_wordlist = load_wordlist()
+    return _default_wordlist
+
+
+def to_codes(password):
+    # one byte per character: ASCII as itself and every other character as a code from 128 up,
+    # the same code wherever it recurs in the password, so the repeat rule still sees it
+    if isinstance(password, bytes):
+        if password.isascii():
+            return password[:MAX_SCORED_LENGTH]
+        password = password.decode('utf-8', 'replace')
+    password = password[:MAX_SCORED_LENGTH]
+    if password.isascii():
+        return password.encode('ascii')
+    others = {}
+    return bytes(ord(c) if c < '\x80' else others.setdefault(c, 128 + len(others)) for c in password)
+
+
+def to_matrix(passwords):
+    encoded = [to_codes(p) for p in passwords]
+    width = max(1, max(map(len, encoded), default=0))
+    matrix = np.frombuffer(b''.join(p.ljust(width, b'\0') for p in encoded), dtype=np.uint8)
+    return matrix.reshape(len(encoded), width), np.array([len(p) for p in encoded])
+
+
+def word_matches(wordlist, variants, lengths):
+    # Every substring of 3 or more characters that some variant of the text has in the wordlist,
+    # as (row, start, end, bits) arrays. A match costs log2 of the word's rank, a bit if it has
+    # capitals and one per leetspeak substitution.
+    width = variants[0][0].shape[1]
+    found = []
+    for text, upper, substituted in variants:
+        upper_seen = np.zeros((len(text), width + 1))
+        np.cumsum(upper, axis=1, out=upper_seen[:, 1:])
+        substitutions = np.zeros((len(text), width + 1))
+        np.cumsum(substituted, axis=1, out=substitutions[:, 1:])
+        may_start = wordlist.prefixes[trigram_codes(text)]
+        for size in range(3, min(width, wordlist.width) + 1):
+            starts = np.arange(width - size + 1)
+            row, start = np.nonzero(may_start[:, :width - size + 1] & (starts + size <= lengths[:, None]))
+            windows = np.ascontiguousarray(text[row[:, None], start[:, None] + np.arange(size)])
+            ranks = wordlist.rank(windows.view(f'S{size}').ravel())
+            hit = ranks >= 0
+            row, start, end = row[hit], start[hit], start[hit] + size
+            bits = (np.log2(ranks[hit] + 2.0) + (upper_seen[row, end] > upper_seen[row, start])
+                    + substitutions[row, end] - substitutions[row, start])
+            found.append((row, start, end, bits))
+    if not found:
+        return (np.empty(0, dtype=np.intp),) * 3 + (np.empty(0),)
+    return tuple(np.concatenate(parts) for parts in zip(*found))
+
+
+def score_batch(passwords, wordlist=None):
+    # Estimated guessing entropy in bits and a 0-4 score for each password. Characters cost the
+    # log2 of the character set the password draws from, or much less when they repeat, continue
+    # a sequence or walk the keyboard. Any run of characters that is a known word (case and
+    # leetspeak undone) may cost its word rank plus those variations instead, and the password
+    # is charged for its cheapest split into such words and single characters.
+    wordlist = wordlist if wordlist is not None else default_wordlist()
+    matrix, lengths = to_matrix(passwords)
+    width = matrix.shape[1]
+    columns = np.arange(width)
+    valid = columns < lengths[:, None]
+
+    classes = CHAR_CLASS[matrix]
+    full_bits = CHARSET_BITS[np.bitwise_or.reduce(classes, axis=1)]
+    bits = np.repeat(full_bits[:, None], width, axis=1)
+    if width > 1:
+        prev, cur = matrix[:, :-1], matrix[:, 1:]
+        step = cur.astype(np.int16) - prev
+        same_class = classes[:, 1:] == classes[:, :-1]
+        ordered = same_class & ((classes[:, 1:] & (LOWER | UPPER | DIGIT)) != 0) & (np.abs(step) == 1)
+        cheap = np.where(step == 0, REPEAT_BITS,
+                         np.where(ordered, SEQUENCE_BITS, np.where(ADJACENT[prev, cur], WALK_BITS, np.inf)))
+        bits[:, 1:] = np.minimum(bits[:, 1:], cheap)
+    bits[~valid] = 0
+
+    upper = classes == UPPER
+    leet = IS_LEET[matrix]
+    row, start, end, word = word_matches(wordlist, [(LOWERED[matrix], upper, np.zeros_like(leet)),
+                                                    (NORMALIZED[matrix], upper, leet)], lengths)
+    order = np.argsort(end, kind='stable')
+    row, start, end, word = row[order], start[order], end[order], word[order]
+    bounds = np.searchsorted(end, np.arange(width + 2))
+    # cheapest split of each prefix, extended one character or one word at a time
+    split = np.zeros((width + 1, len(matrix)))
+    for i in range(1, width + 1):
+        split[i] = split[i - 1] + bits[:, i - 1]
+        at = slice(bounds[i], bounds[i + 1])
+        np.minimum.at(split[i], row[at], split[start[at], row[at]] + word[at])
+    best = split[width]
+    return best, np.searchsorted(SCORE_THRESHOLDS, best, side='right')
+
+
+def estimate_strength(password, wordlist=None):
+    bits, scores = score_batch([password], wordlist)
+    return float(bits[0]), int(scores[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate the strength of every password in a file (one per line)")
+    parser.add_argument("input")
+    parser.add_argument("--wordlist", help="extra dictionary words, most common first")
+    parser.add_argument("--output", help="write password, bits and score for each line to this CSV file")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.batch_size < 1:
+        parser.error("batch size must be positive")
+    started = time.perf_counter()
+    try:
+        wordlist = load_wordlist(args.wordlist)
+        totals = np.zeros(len(SCORE_LABELS), dtype=np.int64)
+        bit_sum = 0.0
+        out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else None
+        try:
+            writer = csv.writer(out) if out else None
+            if writer:
+                writer.writerow(["password", "bits", "score"])
+            for batch in iter_line_batches(args.input, args.batch_size):
+                bits, scores = score_batch(batch, wordlist)
+                totals += np.bincount(scores, minlength=len(SCORE_LABELS))
+                bit_sum += bits.sum()
+                if writer:
+                    writer.writerows(zip((p.decode('utf-8', 'replace') for p in batch),
+                                         np.round(bits, 1).tolist(), scores.tolist()))
+        finally:
+            if out:
+                out.close()
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    count = int(totals.sum())
+    elapsed = time.perf_counter() - started
+    print(f"{count} passwords scored in {elapsed:.2f}s ({count / elapsed if elapsed else 0:,.0f}/s)")
+    if count:
+        print(f"mean estimated entropy: {bit_sum / count:.1f} bits")
+        for label, n in zip(SCORE_LABELS, totals):
+            print(f"  {label:<12}{n:>12}{n / count:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+from collections import OrderedDict
+
+
+SQLITE_MAX_PARAMS = 500
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_VAULT = os.path.join(BASE_DIR, "pseudonyms.db")
+DEFAULT_KEY_FILE = os.path.join(BASE_DIR, "pseudonym.key")
+# hex digits of the keyed hash kept in a token (80 bits); collisions are still checked against the vault
+TOKEN_DIGITS = 20
+
+
+def load_or_create_key(key_file=DEFAULT_KEY_FILE):
+    if os.path.exists(key_file):
+        with open(key_file, 'rb') as f:
+            return f.read()
+    key = secrets.token_bytes(32)
+    fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+class PseudonymVault:
+    # Tokens are keyed hashes of the name, so every process derives the same token without
+    # coordination; the vault records them so mappings survive key rotation and can be audited.
+    def __init__(self, db_path=DEFAULT_VAULT, key=None, prefix="Person_", cache_size=100000, flush_every=5000):
+        self.key = key if key is not None else load_or_create_key()
+        self.prefix = prefix
+        self.cache_size = cache_size
+        self.flush_every = flush_every
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.pending_tokens = set()
+        self.conn = sqlite3.connect(db_path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pseudonyms (name TEXT PRIMARY KEY, token TEXT NOT NULL) WITHOUT ROWID")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pseudonyms_token ON pseudonyms (token)")
+
+    def make_token(self, name, attempt=0):
+        # a later attempt hashes a counter in as well, for the rare name whose token is taken
+        message = name if not attempt else f"{attempt}\0{name}"
+        digest = hmac.new(self.key, message.encode('utf-8'), hashlib.sha256).hexdigest()
+        return self.prefix + digest[:TOKEN_DIGITS]
+
+    def taken_tokens(self, tokens):
+        taken = self.pending_tokens.intersection(tokens)
+        for i in range(0, len(tokens), SQLITE_MAX_PARAMS):
+            chunk = tokens[i:i + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT token FROM pseudonyms WHERE token IN ({placeholders})", chunk)
+            taken.update(token for token, in rows)
+        return taken
+
+    def assign_tokens(self, names, found):
+        # new names get their hashed token unless another name already holds it
+        candidates = {name: self.make_token(name) for name in names}
+        attempt = 0
+        while candidates:
+            taken = self.taken_tokens(list(candidates.values()))
+            retry = []
+            for name, token in candidates.items():
+                if token in taken:
+                    retry.append(name)
+                    continue
+                taken.add(token)
+                found[name] = token
+                self.pending[name] = token
+                self.pending_tokens.add(token)
+                self.remember(name, token)
+            attempt += 1
+            candidates = {name: self.make_token(name, attempt) for name in retry}
+
+    def remember(self, name, token):
+        self.cache[name] = token
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def lookup_many(self, names):
+        found = {}
+        misses = []
+        for name in set(names):
+            token = self.cache.get(name)
+            if token is not None:
+                self.cache.move_to_end(name)
+                found[name] = token
+                continue
+            # written but not yet flushed, and since evicted from the cache
+            token = self.pending.get(name)
+            if token is not None:
+                found[name] = token
+                self.remember(name, token)
+            else:
+                misses.append(name)
+
+        for i in range(0, len(misses), SQLITE_MAX_PARAMS):
+            chunk = misses[i:i + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT name, token FROM pseudonyms WHERE name IN ({placeholders})", chunk)
+            for name, token in rows:
+                found[name] = token
+                self.remember(name, token)
+
+        self.assign_tokens([name for name in misses if name not in found], found)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+        return found
+
+    def lookup(self, name):
+        return self.lookup_many([name])[name]
+
+    def flush(self):
+        if not self.pending:
+            return
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO pseudonyms (name, token) VALUES (?, ?)",
+                                  self.pending.items())
+        self.pending = {}
+        self.pending_tokens = set()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def pseudonymize_spans(text, spans, vault):
+    # resolves all names of a piece of text in one batched vault lookup
+    spans = list(spans)
+    tokens = vault.lookup_many(text[start:end] for start, end, _ in spans)
+    return [(start, end, tokens[text[start:end]]) for start, end, _ in spans]
@@ -0,0 +1,40 @@
+import io
+import random
+import pytest
+import anon_stream
+from anon_stream import anonymize_stream, anonymize_text
+from name_index import NameIndex
+
+
+NAMES = NameIndex(["John", "Mary", "Linda", "Bob"])
+TOKENS = ["John", "Mary.", "Hello", "world", "(John)", "x", "?", "!", "Mr.", "Linda!", "A", "Bob", "bob", "Johnny"]
+
+
+def random_text(rng):
+    return ''.join(rng.choice(TOKENS) + rng.choice([" ", "\n", "", "\t", " "]) for _ in range(rng.randint(0, 30)))
+
+
+def stream(text, chunk_size):
+    out = io.StringIO()
+    anonymize_stream(io.StringIO(text), out, NAMES, chunk_size=chunk_size)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 50])
+def test_stream_matches_whole_text(chunk_size):
+    # chunk boundaries must not change which names are found, including sentence-opening words
+    rng = random.Random(chunk_size)
+    for _ in range(1000):
+        text = random_text(rng)
+        assert stream(text, chunk_size) == anonymize_text(text, NAMES)
+
+
+def test_names_are_replaced():
+    assert anonymize_text("I met John and Mary. Johnny stayed.", NAMES) == "I met xxx and xxx. Johnny stayed."
+
+
+def test_token_longer_than_the_carry_limit(monkeypatch):
+    # a piece without whitespace is cut once it reaches the limit, and the rest of it passes through
+    monkeypatch.setattr(anon_stream, "MAX_TOKEN_CARRY", 8)
+    text = "Hello " + "y" * 40 + " John went home"
+    assert stream(text, 3) == anonymize_text(text, NAMES)
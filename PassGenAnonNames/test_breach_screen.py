@@ -0,0 +1,60 @@
+import hashlib
+import numpy as np
+import pytest
+from breach_screen import BreachIndex, build_breach_index, parse_hash_lines, sha1_prefixes
+
+
+def write_hash_list(path, passwords):
+    path.write_text(''.join(f"{hashlib.sha1(p.encode()).hexdigest().upper()}:{i + 1}\n"
+                            for i, p in enumerate(passwords)))
+    return str(path)
+
+
+@pytest.mark.parametrize("run_size", [7, 1000])
+def test_index_finds_exactly_the_listed_passwords(tmp_path, run_size):
+    breached = [f"pw{i}" for i in range(300)]
+    first = write_hash_list(tmp_path / "a.txt", breached[:200])
+    # overlapping lists, so the runs share hashes that the merge must de-duplicate
+    second = write_hash_list(tmp_path / "b.txt", breached[150:])
+    path = str(tmp_path / "breached.idx")
+    assert build_breach_index(path, [first, second], run_size=run_size) == 300
+    index = BreachIndex(path)
+    try:
+        assert len(index) == 300
+        assert index.contains_many(breached).all()
+        assert not index.contains_many([f"safe{i}" for i in range(1000)]).any()
+        assert "pw42" in index and "pw300" not in index
+        assert np.all(np.diff(index.hashes.astype(np.uint64)) > 0)
+    finally:
+        index.close()
+
+
+def test_plaintext_lists(tmp_path):
+    (tmp_path / "plain.txt").write_text("hunter2\nletmein\r\n\nhunter2\n")
+    path = str(tmp_path / "breached.idx")
+    assert build_breach_index(path, [str(tmp_path / "plain.txt")], plaintext=True) == 2
+    index = BreachIndex(path)
+    try:
+        assert index.contains_many(["letmein", "hunter2", "hunter3"]).tolist() == [True, True, False]
+    finally:
+        index.close()
+
+
+def test_hash_lines_are_validated():
+    digest = hashlib.sha1(b"abc").hexdigest()
+    assert parse_hash_lines([digest.encode(), digest.upper().encode() + b":12", b""], False).tolist() \
+        == sha1_prefixes(["abc", "abc"]).tolist()
+    for bad in [b"1234", b"zz" + digest.encode()[2:], digest.encode() + b"ff", digest.encode() + b":x"]:
+        with pytest.raises(ValueError):
+            parse_hash_lines([bad], False)
+
+
+def test_empty_index(tmp_path):
+    (tmp_path / "empty.txt").write_text("")
+    path = str(tmp_path / "breached.idx")
+    assert build_breach_index(path, [str(tmp_path / "empty.txt")]) == 0
+    index = BreachIndex(path)
+    try:
+        assert not index.contains_many(["anything"]).any()
+    finally:
+        index.close()
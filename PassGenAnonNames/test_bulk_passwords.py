@@ -0,0 +1,61 @@
+import io
+import pytest
+from breach_screen import BreachIndex, build_breach_index
+from bulk_passwords import make_block_function, policy_classes, write_blocks, write_parallel
+
+
+@pytest.mark.parametrize("count", [1, 57, 100])
+def test_unique_output_has_no_repeats(count):
+    out = io.BytesIO()
+    assert write_parallel(out, count, 2, "0123456789", workers=2, unique=True, block_size=7) == count
+    passwords = out.getvalue().decode('ascii').split('\n')[:-1]
+    assert len(passwords) == count == len(set(passwords))
+    assert all(len(p) == 2 and p.isdigit() for p in passwords)
+
+
+def test_unique_output_keeps_generation_order():
+    # sorted output of 2000 random passwords would be a one in 2000! accident
+    out = io.BytesIO()
+    write_parallel(out, 2000, 12, workers=2, unique=True)
+    passwords = out.getvalue().split(b'\n')[:-1]
+    assert len(set(passwords)) == 2000
+    assert passwords != sorted(passwords)
+
+
+def test_unique_refuses_more_than_exist():
+    with pytest.raises(ValueError):
+        write_parallel(io.BytesIO(), 101, 2, "0123456789", unique=True)
+
+
+def test_fully_breached_space_fails_instead_of_looping(tmp_path):
+    (tmp_path / "plain.txt").write_text("a\nb\n")
+    index_path = str(tmp_path / "breached.idx")
+    build_breach_index(index_path, [str(tmp_path / "plain.txt")], plaintext=True)
+    index = BreachIndex(index_path)
+    try:
+        with pytest.raises(ValueError, match="breached"):
+            write_blocks(io.BytesIO(), 5, make_block_function(1, "ab"), breach_index=index)
+        with pytest.raises(ValueError, match="breached"):
+            index.draw(lambda: "a")
+        assert index.draw(lambda: "c") == "c"
+    finally:
+        index.close()
+    with pytest.raises(ValueError, match="breached"):
+        write_parallel(io.BytesIO(), 2, 1, "ab", workers=1, unique=True, breach_index_path=index_path)
+
+
+def test_unique_stops_when_the_unbreached_space_runs_out(tmp_path):
+    (tmp_path / "plain.txt").write_text("0\n1\n2\n")
+    index_path = str(tmp_path / "breached.idx")
+    build_breach_index(index_path, [str(tmp_path / "plain.txt")], plaintext=True)
+    with pytest.raises(ValueError, match="exhausted"):
+        write_parallel(io.BytesIO(), 4, 1, "0123", workers=1, unique=True, breach_index_path=index_path)
+
+
+def test_policy_keeps_to_the_alphabet():
+    classes = policy_classes("ab12~é")
+    assert classes["lowercase"] == "ab" and classes["digits"] == "12" and classes["other"] == "é"
+    assert classes["uppercase"] == ""
+    block = make_block_function(6, policy_args=(6, {"digits": 2}, policy_classes("ab12~"), "", 1))(50)
+    passwords = block.decode('ascii').split('\n')[:-1]
+    assert all(set(p) <= set("ab12~") and sum(c.isdigit() for c in p) >= 2 for p in passwords)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from file_batches import iter_line_batches, iter_merged_runs
+
+
+def write_runs(tmp_path, runs, dtype):
+    paths = []
+    for i, run in enumerate(runs):
+        path = tmp_path / f"run{i}"
+        np.unique(np.asarray(run, dtype=dtype)).tofile(path)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize("block", [1, 3, 64])
+def test_merge_matches_sorting_everything(tmp_path, block):
+    rng = np.random.default_rng(5)
+    runs = [rng.integers(0, 500, size=rng.integers(0, 300), dtype=np.uint64) for _ in range(7)]
+    paths = write_runs(tmp_path, runs, '<u8')
+    blocks = list(iter_merged_runs(paths, '<u8', block))
+    merged = np.concatenate([values for values, _ in blocks])
+    counts = np.concatenate([holding for _, holding in blocks])
+    expected, expected_counts = np.unique(np.concatenate([np.unique(run) for run in runs]), return_counts=True)
+    assert np.array_equal(merged, expected)
+    assert np.array_equal(counts, expected_counts)
+
+
+def test_merge_of_byte_records(tmp_path):
+    paths = write_runs(tmp_path, [[b"bb\n", b"aa\n"], [b"cc\n", b"aa\n"], []], 'S3')
+    blocks = list(iter_merged_runs(paths, 'S3', 1))
+    assert [r for values, _ in blocks for r in values.tolist()] == [b"aa\n", b"bb\n", b"cc\n"]
+    assert [c for _, counts in blocks for c in counts.tolist()] == [2, 1, 1]
+
+
+def test_merge_of_nothing(tmp_path):
+    assert list(iter_merged_runs(write_runs(tmp_path, [[], []], '<u8'), '<u8')) == []
+
+
+def test_line_batches(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_bytes(b"one\r\ntwo\nthree\nfour")
+    assert list(iter_line_batches(str(path), 3)) == [[b"one", b"two", b"three"], [b"four"]]
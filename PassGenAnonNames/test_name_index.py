@@ -0,0 +1,17 @@
+import pickle
+import pytest
+from name_index import load_base_names
+
+
+@pytest.mark.parametrize("contents", [
+    b"",
+    pickle.dumps(frozenset(["alice", "bob"]))[:-5],
+    b"\x80\x04\x95garbage",
+    b"cnot_a_module\nNoSuchClass\n.",
+    pickle.dumps(["alice", "bob"]),
+])
+def test_broken_cache_is_rebuilt(tmp_path, contents):
+    cache = tmp_path / "names.pkl"
+    cache.write_bytes(contents)
+    names = load_base_names(str(cache))
+    assert isinstance(names, frozenset) and len(names) > 2
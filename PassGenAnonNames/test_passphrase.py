@@ -0,0 +1,44 @@
+import itertools
+import math
+from collections import Counter
+import pytest
+from passphrase import PassphraseGenerator, WordIndex
+
+
+WORDS = ["apple", "Berry", "42nd", "zed"]
+
+
+@pytest.fixture
+def wordlist(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text(''.join(f"{11110 + i} {word}\n" for i, word in enumerate(WORDS)))
+    index = WordIndex(str(path))
+    yield index
+    index.close()
+
+
+def enumerated_entropy(words, capitalization, digits):
+    # Shannon entropy of the passphrase over every equally likely set of choices the generator draws
+    seen = Counter()
+    for chosen in itertools.product(WORDS, repeat=words):
+        for capitals in itertools.product([False, True] if capitalization == "random" else [False], repeat=words):
+            for places in itertools.product(range(words), repeat=digits):
+                for values in itertools.product("0123456789", repeat=digits):
+                    parts = [w[:1].upper() + w[1:] if up else w for w, up in zip(chosen, capitals)]
+                    for place, value in zip(places, values):
+                        parts[place] += value
+                    seen['-'.join(parts)] += 1
+    total = sum(seen.values())
+    return -sum(n / total * math.log2(n / total) for n in seen.values())
+
+
+def test_index_counts_words_and_cased_words(wordlist):
+    assert len(wordlist) == 4 and wordlist.cased == 2
+    assert [wordlist[i] for i in range(4)] == WORDS
+
+
+@pytest.mark.parametrize("words,capitalization,digits", [(2, "lower", 0), (2, "random", 0), (2, "lower", 2),
+                                                         (3, "random", 1), (2, "title", 2)])
+def test_entropy_counts_only_visible_choices(wordlist, words, capitalization, digits):
+    generator = PassphraseGenerator(wordlist, words, "-", capitalization, digits)
+    assert generator.entropy() == pytest.approx(enumerated_entropy(words, capitalization, digits))
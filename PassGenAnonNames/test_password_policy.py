@@ -0,0 +1,82 @@
+import itertools
+from collections import Counter
+import pytest
+from password_policy import MAX_LENGTH, PasswordPolicy, default_policy
+
+
+CLASSES = {"lower": "ab", "digits": "01", "upper": "XYZ"}
+POLICIES = [
+    ({}, None),
+    ({"lower": 1}, None),
+    ({"digits": 2}, None),
+    ({"lower": 2, "digits": 1, "upper": 1}, None),
+    ({}, 1),
+    ({"lower": 1}, 2),
+    ({"upper": 2, "lower": 1}, 1),
+    ({"lower": 1, "digits": 1}, 2),
+]
+
+
+def allowed(length, minimums, max_repeat, classes=CLASSES):
+    # every password of the policy, by enumeration
+    passwords = []
+    for chars in itertools.product(''.join(classes.values()), repeat=length):
+        if any(sum(c in classes[name] for c in chars) < minimum for name, minimum in minimums.items()):
+            continue
+        if max_repeat is not None and any(len(list(run)) > max_repeat for _, run in itertools.groupby(chars)):
+            continue
+        passwords.append(''.join(chars))
+    return passwords
+
+
+@pytest.mark.parametrize("minimums,max_repeat", POLICIES)
+@pytest.mark.parametrize("length", range(1, 6))
+def test_count_matches_enumeration(length, minimums, max_repeat):
+    expected = allowed(length, minimums, max_repeat)
+    if sum(minimums.values()) > length or not expected:
+        with pytest.raises(ValueError):
+            PasswordPolicy(length, minimums, CLASSES, "", max_repeat)
+        return
+    assert PasswordPolicy(length, minimums, CLASSES, "", max_repeat).count() == len(expected)
+
+
+@pytest.mark.parametrize("minimums,max_repeat", POLICIES)
+def test_samples_are_uniform(minimums, max_repeat):
+    expected = allowed(4, minimums, max_repeat)
+    policy = PasswordPolicy(4, minimums, CLASSES, "", max_repeat)
+    draws = 20 * len(expected)
+    seen = Counter(policy.generate_many(draws))
+    assert set(seen) == set(expected)
+    # chi-squared against the uniform distribution, far beyond any plausible fluctuation
+    chi2 = sum((seen[p] - 20) ** 2 / 20 for p in expected)
+    dof = len(expected) - 1
+    assert chi2 < dof + 8 * dof ** 0.5
+
+
+def test_exclusions_apply_to_every_class():
+    policy = PasswordPolicy(4, {"digits": 1}, CLASSES, "0aZ", 1)
+    assert policy.count() == len(allowed(4, {"digits": 1}, 1, {"lower": "b", "digits": "1", "upper": "XY"}))
+    assert all(not set(p) & set("0aZ") for p in policy.generate_many(200))
+
+
+@pytest.mark.parametrize("length,minimums,max_repeat", [
+    (0, {}, None),
+    (MAX_LENGTH + 1, {}, None),
+    (8, {"digits": -1}, None),
+    (8, {"digits": 5, "lower": 4}, None),
+    (8, {"nope": 1}, None),
+    (8, {}, 0),
+])
+def test_invalid_policies_are_refused(length, minimums, max_repeat):
+    with pytest.raises(ValueError):
+        PasswordPolicy(length, minimums, CLASSES, "", max_repeat)
+
+
+def test_long_and_tight_policies_build_quickly():
+    # sizes that exhausted the old recursive counts
+    for policy in [PasswordPolicy(1500, max_repeat=2),
+                   PasswordPolicy(128, {name: 20 for name in ("digits", "punctuation", "uppercase", "lowercase")})]:
+        password = policy.generate()
+        assert len(password) == policy.length
+        assert sum(c.isdigit() for c in password) >= (20 if policy.length == 128 else 0)
+    assert len(default_policy().generate()) == 12
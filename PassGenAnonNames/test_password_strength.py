@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from password_strength import SCORE_THRESHOLDS, Wordlist, estimate_strength, score_batch
+
+
+@pytest.mark.parametrize("password", ["password", "mypassword", "P@ssw0rd!", "password123",
+                                      "correcthorsebatterystaple", "qwerty", "aaaaaaaaaaaa"])
+def test_words_and_patterns_score_weak(password):
+    bits, score = estimate_strength(password)
+    assert bits < SCORE_THRESHOLDS[1] and score <= 1
+
+
+@pytest.mark.parametrize("password", ["kX9#mQ2$vL7@", "u8%Rz!Qw2#Lp7&Tn"])
+def test_random_passwords_score_strong(password):
+    assert estimate_strength(password)[1] >= 3
+
+
+def test_words_inside_a_password_lower_its_score():
+    alone, _ = estimate_strength("xq7#")
+    with_word, _ = estimate_strength("xq7#dragon")
+    with_letters, _ = estimate_strength("xq7#drqgzn")
+    assert alone < with_word < with_letters
+
+
+def test_batch_matches_single_scores():
+    passwords = ["", "a", "ab", "dragon1", "Tr0ub4dor&3", "correcthorse", "zz" * 40]
+    bits, scores = score_batch(passwords)
+    for password, b, s in zip(passwords, bits, scores):
+        assert (b, s) == pytest.approx(estimate_strength(password))
+
+
+def test_rank_ignores_candidates_longer_than_every_word():
+    wordlist = Wordlist(["dragon", "monkey"])
+    ranks = wordlist.rank(np.array([b"dragon", b"dragonfly", b"monk", b"monkey"]))
+    assert ranks.tolist() == [0, -1, -1, 1]
+
+
+def test_non_ascii_characters_are_scored_once_each():
+    # each UTF-8 byte used to be charged as a character, and the repeat rule never saw a repeat
+    repeated, score = estimate_strength("ééééé")
+    assert repeated < SCORE_THRESHOLDS[0] and score == 0
+    assert estimate_strength("ééééé".encode('utf-8')) == (repeated, score)
+    assert estimate_strength("éàüöç")[0] > repeated
+    assert estimate_strength("édragon")[0] < estimate_strength("édrqgzn")[0]